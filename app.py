@@ -8,11 +8,17 @@ Ollama电机控制测试脚本
 import os
 import sys
 import argparse
+import json
 import time
 from loguru import logger
 
 from motor_controller.myactuator_controller_ollama import MyActuatorControllerOllama
-from audio.respeaker import get_asr_result
+from motor_controller.emergency_stop import EmergencyStop
+from motor_controller.coalescer import TranscriptDeduper
+from audio.respeaker import get_asr_result, find_respeaker, check_asr_server
+from audio.doa import DoaTracker, DoaReflex
+from llm.speculative import SpeculativeExecutor
+from startup import StartupOrchestrator
 
 
 def setup_logging():
@@ -29,17 +35,132 @@ def setup_logging():
         format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}"
     )
 
+
+def load_config(path: str) -> dict:
+    """加载JSON配置文件, 文件不存在时返回空配置"""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def setup_doa_reflex(controller, config: dict):
+    """初始化DOA反射, 找不到ReSpeaker时返回None"""
+    reflex_config = config.get("doa_reflex", {})
+    if not reflex_config.get("enabled", True):
+        return None
+    try:
+        tuning = find_respeaker()
+    except Exception as e:
+        logger.warning(f"打开ReSpeaker失败: {e}")
+        tuning = None
+    if tuning is None:
+        logger.warning("ReSpeaker Mic Array not found, DOA反射已禁用")
+        return None
+
+    tracker = DoaTracker(tuning)
+    reflex = DoaReflex(controller, tracker, reflex_config.get("calibration"), reflex_config.get("keywords"))
+    tracker.start()
+    return reflex
+
+
+def startup(controller, config: dict) -> dict:
+    """并行完成CAN、Ollama、ASR和ReSpeaker的初始化, 输出就绪报告"""
+    components = {}
+
+    def start_can():
+        controller.connect()
+        handshake = controller.handshake()
+        ok = sum(1 for r in handshake.values() if r["success"])
+        if ok == 0:
+            raise RuntimeError(f"没有电机响应: {handshake}")
+        return f"{ok}/{len(handshake)} 个电机响应"
+
+    def start_ollama():
+        if not controller.test_connection():
+            raise RuntimeError(f"无法连接Ollama: {controller.base_url}")
+        preload = controller.preload_model()
+        if not preload["success"]:
+            raise RuntimeError(preload["error"])
+        return f"模型 {controller.model} 已加载 ({preload['load_duration_ms']:.0f}ms)"
+
+    def start_asr():
+        if not check_asr_server():
+            raise RuntimeError("ASR服务不可达")
+        return "ASR服务可达"
+
+    def start_respeaker():
+        components["doa_reflex"] = setup_doa_reflex(controller, config)
+        return "DOA反射已启用" if components["doa_reflex"] is not None else "DOA反射已禁用"
+
+    orchestrator = StartupOrchestrator()
+    orchestrator.add("can", start_can, required=True)
+    orchestrator.add("ollama", start_ollama)
+    orchestrator.add("asr", start_asr)
+    orchestrator.add("respeaker", start_respeaker)
+    orchestrator.run(timeout=config.get("startup_timeout", 30.0))
+    orchestrator.print_report()
+
+    if not orchestrator.ready:
+        raise RuntimeError("必需组件启动失败")
+    return components
+
+
+def is_valid_command(command: str) -> bool:
+    """过滤空白音频和whisper的非语音标注"""
+    return bool(command) and "BLANK_AUDIO" not in command and "(" not in command and "[" not in command
+
+
+def run_command(controller, command: str, speculator=None, fast_paths=()):
+    """执行一条最终确认的命令, 优先尝试不经过大模型的快速路径"""
+    logger.info(f"Received command: {command}")
+    try:
+        if not is_valid_command(command):
+            logger.info("Received blank audio, skipping command execution.")
+            result = {"success": False, "error": "Received blank audio"}
+        else:
+            result = None
+            for fast_path in fast_paths:
+                result = fast_path.try_handle(command)
+                if result is not None:
+                    break
+            if result is not None:
+                if speculator is not None:
+                    speculator.discard()
+            elif speculator is not None:
+                result = speculator.commit(command)
+            else:
+                result = controller.execute_natural_language_command(command)
+    except Exception as e:
+        logger.error(f"执行命令失败: {e}")
+        result = {"success": False, "error": str(e)}
+    logger.info(f"Command result: {result}")
+
+
 def main():
     """主函数"""
     parser = argparse.ArgumentParser(description="Ollama电机控制系统")
-    parser.add_argument("--model", default="qwen2.5:7b-instruct", help="Ollama模型名称")
+    parser.add_argument("--model", default=None, help="Ollama模型名称 (默认读取配置文件, 否则为qwen2.5:7b-instruct)")
     parser.add_argument("--url", default="http://localhost:11434", help="Ollama服务地址")
+    parser.add_argument("--config", default="config.json", help="配置文件路径")
+    parser.add_argument("--motor-process", action="store_true", help="在独立进程中运行电机驱动")
+    parser.add_argument("--speculative", action="store_true", help="转写文本稳定后提前推理")
+    parser.add_argument("--spec-stable", type=float, default=0.5, help="文本稳定多少秒后开始推测推理")
+    parser.add_argument("--spec-final", type=float, default=1.5, help="文本稳定多少秒后视为最终结果")
+    parser.add_argument("--spec-timeout", type=float, default=5.0, help="命中时最多等待推测推理多少秒")
+    parser.add_argument("--spec-poll", type=float, default=0.2, help="推测模式下的ASR轮询间隔(秒)")
     args = parser.parse_args()
     
     setup_logging()
+    config = load_config(args.config)
+    model = args.model or config.get("model", "qwen2.5:7b-instruct")
 
-    # 初始化控制器
-    controller = MyActuatorControllerOllama(model=args.model, base_url=args.url)
+    # 初始化控制器, CAN总线在启动编排器中与其他组件并行打开
+    controller = MyActuatorControllerOllama(model=model, base_url=args.url, connect=False,
+                                            scheduler_options=config.get("can_scheduler"),
+                                            out_of_process=args.motor_process,
+                                            gestures=config.get("gestures"))
+    components = startup(controller, config)
     	
     # result = controller.execute_natural_language_command("Let motor 3 rotate to 360 degrees")
     # status = controller.get_motor_status("motor_1")
@@ -50,27 +171,62 @@ def main():
     # controller.stop_motor("motor_1")
     # print("running done")
     
+    # 急停: 独立线程监视部分转写结果, 同时作为优先级最高的快速路径
+    estop = EmergencyStop(controller, **config.get("emergency_stop", {}))
+    estop.start()
+    estop.watch(get_asr_result)
+
+    deduper = TranscriptDeduper(**config.get("dedupe", {}))
+    fast_paths = [estop]
+    if controller.gesture_player is not None:
+        fast_paths.append(controller.gesture_player)
+    if components.get("doa_reflex") is not None:
+        fast_paths.append(components["doa_reflex"])
+
+    if args.speculative:
+        run_speculative(controller, args, fast_paths, deduper, estop)
+        return
+
+    # history_command: ASR服务在新结果出现前一直返回上一条转写, 与上次轮询相同的文本不是新的语音;
+    # deduper: 文本变化后, 窗口内与已执行命令相似的转写视为重发; 急停命令不去重
     history_command = ""
     while True:
         command = get_asr_result()
         if command and command != history_command:
             history_command = command
-            logger.info(f"Received command: {command}")
-            try:
-                if "BLANK_AUDIO" not in command and "(" not in command and "[" not in command:
-                    result = controller.execute_natural_language_command(command)
-                else:
-                    logger.info("Received blank audio, skipping command execution.")
-                    result = {"success": False, "error": "Received blank audio"}
-            except Exception as e:
-                logger.error(f"执行命令失败: {e}")
-                result = {"success": False, "error": str(e)}
-            logger.info(f"Command result: {result}")
+            if not is_valid_command(command) or estop.matches(command) or deduper.accept(command):
+                run_command(controller, command, fast_paths=fast_paths)
         else:
             logger.info("No new command received.")
             
         time.sleep(3)  # 模拟处理时间
 
 
+def run_speculative(controller, args, fast_paths=(), deduper=None, estop=None):
+    """推测模式主循环: 高频轮询ASR, 稳定前缀提前推理, 最终结果确认后才执行"""
+    speculator = SpeculativeExecutor(
+        controller,
+        stable_time=args.spec_stable,
+        final_time=args.spec_final,
+        should_speculate=is_valid_command,
+        commit_timeout=args.spec_timeout
+    )
+    try:
+        while True:
+            # observe只在轮询到的文本变化并稳定后返回一次, 变化后的文本再交给deduper按时间窗口判断
+            command = speculator.observe(get_asr_result())
+            if command:
+                if (deduper is None or not is_valid_command(command)
+                        or (estop is not None and estop.matches(command)) or deduper.accept(command)):
+                    run_command(controller, command, speculator, fast_paths)
+                    logger.info(f"Speculation stats: {speculator.get_stats()}")
+                else:
+                    speculator.discard()
+            time.sleep(args.spec_poll)
+    finally:
+        logger.info(f"Speculation stats: {speculator.get_stats()}")
+        speculator.shutdown()
+
+
 if __name__ == "__main__":
     main() 
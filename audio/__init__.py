@@ -1,3 +1,4 @@
-from .respeaker import Tuning, get_asr_result
+from .respeaker import Tuning, get_asr_result, find_respeaker
+from .doa import DoaTracker, DoaReflex
 
-__all__ = ["Tuning", "get_asr_result"]
\ No newline at end of file
+__all__ = ["Tuning", "get_asr_result", "find_respeaker", "DoaTracker", "DoaReflex"]
\ No newline at end of file
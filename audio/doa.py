@@ -0,0 +1,144 @@
+import math
+import re
+import time
+import threading
+from collections import deque
+from typing import Dict, Optional, Any
+from loguru import logger
+
+
+# 触发"转向说话人"反射的关键词
+DEFAULT_KEYWORDS = [
+    r"\blook at me\b",
+    r"\bface me\b",
+    r"\bturn (to|towards?) me\b",
+    r"\bover here\b",
+    r"看我",
+    r"看着我",
+    r"转向我",
+    r"面向我"
+]
+
+DEFAULT_CALIBRATION = {
+    "motor_id": "motor_1",   # 负责转向的电机
+    "offset": 0.0,           # 电机0度对应的DOA角度
+    "invert": False,         # DOA角度方向与电机方向相反时设为True
+    "min_angle": -180.0,     # 电机允许的角度范围
+    "max_angle": 180.0,
+    "speed": 300.0,          # 转向速度 (度/秒)
+    "window": 0.5,           # DOA平滑窗口 (秒)
+    "max_age": 3.0           # 超过该时间的DOA读数视为无效 (秒)
+}
+
+
+def wrap_angle(angle: float) -> float:
+    """将角度归一化到[-180, 180)"""
+    return (angle + 180.0) % 360.0 - 180.0
+
+
+class DoaTracker:
+    """DOA跟踪器 - 后台轮询ReSpeaker的DOAANGLE并在时间窗口内做圆周平均"""
+
+    def __init__(self, tuning, interval: float = 0.05, window: float = 0.5, voice_only: bool = True):
+        self.tuning = tuning
+        self.interval = interval
+        self.window = window
+        self.voice_only = voice_only
+
+        self._samples = deque()
+        self._lock = threading.Lock()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """启动后台轮询线程"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._poll, name="doa-tracker", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止后台轮询线程"""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+
+    def _poll(self):
+        while self._running:
+            try:
+                # 只在有语音时采样, 使角度反映说话人方向而不是噪声源
+                if not self.voice_only or self.tuning.is_voice():
+                    self.add_sample(self.tuning.direction)
+            except Exception as e:
+                logger.warning(f"读取DOA失败: {e}")
+            time.sleep(self.interval)
+
+    def add_sample(self, angle: float, now: Optional[float] = None):
+        """记录一次DOA读数"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._samples.append((now, float(angle)))
+            # 保留最近一个窗口的数据, 至少保留最后一个读数
+            while len(self._samples) > 1 and now - self._samples[0][0] > self.window:
+                self._samples.popleft()
+
+    def smoothed(self, max_age: float = 3.0, now: Optional[float] = None) -> Optional[float]:
+        """返回窗口内DOA读数的圆周平均值 (度, [0, 360)); 没有有效读数时返回None"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            samples = [angle for t, angle in self._samples if now - t <= max_age]
+        if not samples:
+            return None
+
+        x = sum(math.cos(math.radians(a)) for a in samples)
+        y = sum(math.sin(math.radians(a)) for a in samples)
+        return math.degrees(math.atan2(y, x)) % 360.0
+
+
+class DoaReflex:
+    """DOA反射 - 关键词命中后不经过大模型, 直接根据DOA让电机转向说话人"""
+
+    def __init__(self, controller, tracker: DoaTracker, calibration: Optional[Dict[str, Any]] = None,
+                 keywords: Optional[list] = None):
+        self.controller = controller
+        self.tracker = tracker
+        self.calibration = {**DEFAULT_CALIBRATION, **(calibration or {})}
+        self.tracker.window = self.calibration["window"]
+        self.pattern = re.compile("|".join(keywords or DEFAULT_KEYWORDS), re.IGNORECASE)
+
+    def matches(self, command: str) -> bool:
+        """快速关键词匹配"""
+        return bool(command) and self.pattern.search(command) is not None
+
+    def doa_to_motor_angle(self, doa: float) -> float:
+        """按标定参数把DOA角度映射为电机目标角度"""
+        cal = self.calibration
+        angle = wrap_angle(doa - cal["offset"])
+        if cal["invert"]:
+            angle = -angle
+        return max(cal["min_angle"], min(cal["max_angle"], angle))
+
+    def try_handle(self, command: str) -> Optional[Dict[str, Any]]:
+        """命中关键词时执行转向并返回结果, 否则返回None交给大模型处理"""
+        if not self.matches(command):
+            return None
+
+        start = time.perf_counter()
+        doa = self.tracker.smoothed(max_age=self.calibration["max_age"])
+        if doa is None:
+            logger.warning("没有有效的DOA读数, 无法转向说话人")
+            return {"success": False, "error": "没有有效的DOA读数"}
+
+        angle = self.doa_to_motor_angle(doa)
+        result = self.controller.control_motor(self.calibration["motor_id"], angle, self.calibration["speed"])
+        latency_ms = (time.perf_counter() - start) * 1000
+        logger.info(f"DOA反射: DOA {doa:.1f}度 -> 电机角度 {angle:.1f}度, 耗时 {latency_ms:.1f}ms")
+
+        return {
+            "success": result.get("success", False),
+            "reflex": "doa",
+            "doa": doa,
+            "result": result,
+            "latency_ms": latency_ms
+        }
@@ -4,14 +4,16 @@ import logging
 import time
 import sys
 import struct
-import usb.core
-import usb.util
-import requests
+
+# usb和requests在首次使用时才导入, 缩短启动时间
+ASR_URL = "http://127.0.0.1:8080/result"
 
 
 def get_asr_result():
+    import requests
+
     try:
-        url = "http://127.0.0.1:8080/result"
+        url = ASR_URL
         response = requests.get(url, timeout=5)
 
         if response.status_code == 200:
@@ -28,6 +30,27 @@ def get_asr_result():
         return ""
 
 
+def check_asr_server(timeout: float = 2) -> bool:
+    """检查whisper-stream结果服务是否可达"""
+    import requests
+
+    try:
+        response = requests.get(ASR_URL, timeout=timeout)
+        return response.status_code == 200
+    except requests.exceptions.RequestException:
+        return False
+
+
+def find_respeaker():
+    """查找ReSpeaker麦克风阵列, 找不到时返回None"""
+    import usb.core
+
+    dev = usb.core.find(idVendor=0x2886, idProduct=0x0018)
+    if dev is None:
+        return None
+    return Tuning(dev)
+
+
 class Tuning:
     TIMEOUT = 100000
 
@@ -78,6 +101,8 @@ class Tuning:
         }
 
     def write(self, name, value):
+        import usb.util
+
         try:
             data = self.PARAMETERS[name]
         except KeyError:
@@ -99,6 +124,8 @@ class Tuning:
             0, 0, id, payload, self.TIMEOUT)
 
     def read(self, name):
+        import usb.util
+
         try:
             data = self.PARAMETERS[name]
         except KeyError:
@@ -138,6 +165,8 @@ class Tuning:
 
     @property
     def version(self):
+        import usb.util
+
         return self.dev.ctrl_transfer(
             usb.util.CTRL_IN | usb.util.CTRL_TYPE_VENDOR | usb.util.CTRL_RECIPIENT_DEVICE,
             0, 0x80, 0, 1, self.TIMEOUT)[0]
@@ -146,6 +175,8 @@ class Tuning:
         """
         close the interface
         """
+        import usb.util
+
         usb.util.dispose_resources(self.dev)
 
 
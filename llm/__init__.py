@@ -1,4 +1,4 @@
 from .ollama_motor_controller import OllamaMotorController
+from .speculative import SpeculativeExecutor
 
-__all__ = ["OllamaMotorController"]
-
+__all__ = ["OllamaMotorController", "SpeculativeExecutor"]
@@ -1,5 +1,5 @@
 import json
-import requests
+import threading
 from typing import Dict, List, Optional, Any
 from loguru import logger
 
@@ -15,6 +15,12 @@ class OllamaMotorController:
             "motor_2": {"angle": 0, "speed": 0, "status": "idle"},
             "motor_3": {"angle": 0, "speed": 0, "status": "idle"}
         }
+
+        # 急停时递增, 进行中的命令发现epoch变化后放弃执行
+        self.cancel_epoch = 0
+        self.cancel_hooks = []
+        # 当前线程正在分发的命令所属的epoch, 下发的设定点带上它, 急停后调度器会拒绝
+        self._dispatch = threading.local()
         
         # 定义function calling的工具函数
         self.tools = [
@@ -90,6 +96,8 @@ class OllamaMotorController:
     
     def call_ollama(self, user_message: str) -> Dict[str, Any]:
         """调用Ollama API"""
+        import requests
+
         headers = {
             "Content-Type": "application/json"
         }
@@ -161,8 +169,41 @@ class OllamaMotorController:
             "message": f"电机 {motor_id} 已停止"
         }
     
-    def process_ollama_response(self, response: Dict[str, Any]) -> Dict[str, Any]:
+    def run_gesture(self, name: str) -> Dict[str, Any]:
+        """执行预定义手势"""
+        return {"success": False, "error": f"未配置手势库, 无法执行手势: {name}"}
+
+    def stop_all_motors(self) -> Dict[str, Any]:
+        """停止所有电机"""
+        results = {motor_id: self.stop_motor(motor_id) for motor_id in self.motors}
+        return {
+            "success": all(r["success"] for r in results.values()),
+            "results": results
+        }
+
+    def cancel_pending(self):
+        """取消排队中和进行中的命令"""
+        self.cancel_epoch += 1
+        for hook in self.cancel_hooks:
+            try:
+                hook()
+            except Exception as e:
+                logger.error(f"取消命令失败: {e}")
+
+    def current_epoch(self) -> int:
+        """当前线程分发中的命令的epoch, 不在分发中时为最新epoch"""
+        epoch = getattr(self._dispatch, "epoch", None)
+        return self.cancel_epoch if epoch is None else epoch
+
+    def is_cancelled(self, epoch: Optional[int]) -> bool:
+        """命令开始后是否发生过急停"""
+        return epoch is not None and epoch != self.cancel_epoch
+
+    def process_ollama_response(self, response: Dict[str, Any], epoch: Optional[int] = None) -> Dict[str, Any]:
         """处理Ollama的响应"""
+        if self.is_cancelled(epoch):
+            logger.warning("命令已被急停取消")
+            return {"success": False, "cancelled": True, "error": "命令已被急停取消"}
         if "error" in response:
             return {"success": False, "error": response["error"]}
         
@@ -176,8 +217,15 @@ class OllamaMotorController:
                 logger.warning(f"Ollama未返回tool_calls，尝试解析content: {content}")
                 return {"success": False, "error": "模型未返回有效的function calling"}
             
+            if epoch is None:
+                epoch = self.cancel_epoch
+            self._dispatch.epoch = epoch
             results = []
             for tool_call in tool_calls:
+                if self.is_cancelled(epoch):
+                    logger.warning("命令已被急停取消, 剩余工具调用不再执行")
+                    return {"success": False, "cancelled": True, "results": results, "error": "命令已被急停取消"}
+
                 function_name = tool_call["function"]["name"]
                 raw_args = tool_call["function"]["arguments"]
                 if isinstance(raw_args, str):
@@ -195,6 +243,8 @@ class OllamaMotorController:
                     result = self.get_motor_status(arguments["motor_id"])
                 elif function_name == "stop_motor":
                     result = self.stop_motor(arguments["motor_id"])
+                elif function_name == "run_gesture":
+                    result = self.run_gesture(arguments["name"])
                 else:
                     result = {"success": False, "error": f"未知函数: {function_name}"}
                 
@@ -213,18 +263,21 @@ class OllamaMotorController:
         except Exception as e:
             logger.error(f"处理Ollama响应失败: {e}")
             return {"success": False, "error": str(e)}
+        finally:
+            self._dispatch.epoch = None
     
     def execute_natural_language_command(self, command: str) -> Dict[str, Any]:
         """执行自然语言命令"""
         logger.info(f"收到自然语言命令: {command}")
 
+        epoch = self.cancel_epoch
         result = {"success": False}
         count = 0
-        while not result["success"] and count < 5:
+        while not result["success"] and count < 5 and not result.get("cancelled"):
             # 调用Ollama
             ollama_response = self.call_ollama(command)
             # 处理响应
-            result = self.process_ollama_response(ollama_response)
+            result = self.process_ollama_response(ollama_response, epoch)
             count += 1
         return result
     
@@ -237,9 +290,38 @@ class OllamaMotorController:
     
     def test_connection(self) -> bool:
         """测试Ollama连接"""
+        import requests
+
         try:
             response = requests.get(f"{self.base_url}/api/tags", timeout=5)
             return response.status_code == 200
         except Exception as e:
             logger.error(f"Ollama连接测试失败: {e}")
-            return False 
\ No newline at end of file
+            return False
+
+    def preload_model(self, keep_alive: str = "30m") -> Dict[str, Any]:
+        """检查模型是否已安装并预加载到内存, 避免首条命令等待模型加载"""
+        import requests
+
+        try:
+            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
+            response.raise_for_status()
+            # 未写tag的模型名(如llama3)等同于llama3:latest
+            wanted = self.model if ":" in self.model else f"{self.model}:latest"
+            installed = set()
+            for m in response.json().get("models", []):
+                installed.update(n for n in (m.get("name"), m.get("model")) if n)
+            if wanted not in installed and self.model not in installed:
+                return {"success": False, "error": f"模型未安装: {self.model}"}
+
+            # 不带prompt的generate请求只加载模型
+            response = requests.post(
+                f"{self.base_url}/api/generate",
+                json={"model": self.model, "keep_alive": keep_alive},
+                timeout=120
+            )
+            response.raise_for_status()
+            return {"success": True, "load_duration_ms": response.json().get("load_duration", 0) / 1e6}
+        except Exception as e:
+            logger.error(f"预加载模型失败: {e}")
+            return {"success": False, "error": str(e)}
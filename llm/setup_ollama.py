@@ -7,10 +7,28 @@ Ollama安装和配置脚本
 
 import os
 import sys
+import math
+import time
+import argparse
 import subprocess
 import requests
 import json
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+
+# 带标注的基准测试命令集: 命令 -> 期望调用的函数和参数
+BENCHMARK_CORPUS = [
+    {"command": "让电机1旋转到90度", "function": "control_motor", "arguments": {"motor_id": "motor_1", "angle": 90}},
+    {"command": "Rotate motor 2 to -45 degrees", "function": "control_motor", "arguments": {"motor_id": "motor_2", "angle": -45}},
+    {"command": "把3号电机转到180度", "function": "control_motor", "arguments": {"motor_id": "motor_3", "angle": 180}},
+    {"command": "Turn motor 1 back to zero", "function": "control_motor", "arguments": {"motor_id": "motor_1", "angle": 0}},
+    {"command": "电机2以20度每秒的速度转到30度", "function": "control_motor", "arguments": {"motor_id": "motor_2", "angle": 30, "speed": 20}},
+    {"command": "Move motor 3 to 120 degrees slowly at speed 10", "function": "control_motor", "arguments": {"motor_id": "motor_3", "angle": 120, "speed": 10}},
+    {"command": "停止电机1", "function": "stop_motor", "arguments": {"motor_id": "motor_1"}},
+    {"command": "Stop motor 3 now", "function": "stop_motor", "arguments": {"motor_id": "motor_3"}},
+    {"command": "查看电机2的状态", "function": "get_motor_status", "arguments": {"motor_id": "motor_2"}},
+    {"command": "What is the status of motor 1?", "function": "get_motor_status", "arguments": {"motor_id": "motor_1"}}
+]
 
 
 def print_banner():
@@ -203,8 +221,169 @@ def test_model_function_calling(model_name: str) -> bool:
         return False
 
 
+def _percentile(values: List[float], pct: float) -> float:
+    """最近秩法计算百分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _arguments_match(expected: Dict[str, Any], actual: Dict[str, Any]) -> bool:
+    """比较期望参数和模型给出的参数 (数值按浮点比较)"""
+    for key, value in expected.items():
+        if key not in actual:
+            return False
+        if isinstance(value, (int, float)):
+            try:
+                if abs(float(actual[key]) - value) > 1e-6:
+                    return False
+            except (TypeError, ValueError):
+                return False
+        elif actual[key] != value:
+            return False
+    return True
+
+
+def benchmark_model(model_name: str, corpus: Optional[List[Dict[str, Any]]] = None,
+                    runs: int = 1) -> Dict[str, Any]:
+    """在本机上用标注命令集测试模型的function calling准确率、吞吐量和延迟"""
+    try:
+        from llm.ollama_motor_controller import OllamaMotorController
+    except ImportError:
+        from ollama_motor_controller import OllamaMotorController
+
+    corpus = corpus or BENCHMARK_CORPUS
+    controller = OllamaMotorController(model=model_name)
+    print(f"⏱️  基准测试模型 {model_name} ({len(corpus)} 条命令 x {runs} 轮)...")
+
+    # 预热一次, 排除模型加载时间
+    controller.call_ollama(corpus[0]["command"])
+
+    latencies = []
+    tool_correct = 0
+    args_correct = 0
+    prompt_tokens = prompt_ns = eval_tokens = eval_ns = 0
+    total = 0
+
+    for _ in range(runs):
+        for sample in corpus:
+            start = time.perf_counter()
+            response = controller.call_ollama(sample["command"])
+            latencies.append((time.perf_counter() - start) * 1000)
+            total += 1
+
+            if "error" in response:
+                continue
+            prompt_tokens += response.get("prompt_eval_count", 0)
+            prompt_ns += response.get("prompt_eval_duration", 0)
+            eval_tokens += response.get("eval_count", 0)
+            eval_ns += response.get("eval_duration", 0)
+
+            tool_calls = response.get("message", {}).get("tool_calls") or []
+            if not tool_calls:
+                continue
+            function = tool_calls[0]["function"]
+            if function["name"] != sample["function"]:
+                continue
+            tool_correct += 1
+
+            arguments = function["arguments"]
+            if isinstance(arguments, str):
+                try:
+                    arguments = json.loads(arguments)
+                except json.JSONDecodeError:
+                    continue
+            if _arguments_match(sample["arguments"], arguments):
+                args_correct += 1
+
+    return {
+        "model": model_name,
+        "samples": total,
+        "tool_accuracy": tool_correct / total if total else 0.0,
+        "argument_accuracy": args_correct / total if total else 0.0,
+        "prompt_tokens_per_s": prompt_tokens / (prompt_ns / 1e9) if prompt_ns else 0.0,
+        "generation_tokens_per_s": eval_tokens / (eval_ns / 1e9) if eval_ns else 0.0,
+        "mean_latency_ms": sum(latencies) / len(latencies) if latencies else 0.0,
+        "p95_latency_ms": _percentile(latencies, 95)
+    }
+
+
+def select_fastest_model(results: List[Dict[str, Any]], threshold: float = 0.9) -> Optional[Dict[str, Any]]:
+    """在准确率达到阈值的模型中选择p95延迟最低的模型"""
+    qualified = [
+        r for r in results
+        if r["tool_accuracy"] >= threshold and r["argument_accuracy"] >= threshold
+    ]
+    if not qualified:
+        return None
+    return min(qualified, key=lambda r: r["p95_latency_ms"])
+
+
+def write_model_to_config(model_name: str, config_path: str = "config.json"):
+    """把选中的模型写入配置文件, 保留其他配置项"""
+    config = {}
+    if os.path.exists(config_path):
+        with open(config_path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    config["model"] = model_name
+    with open(config_path, "w", encoding="utf-8") as f:
+        json.dump(config, f, ensure_ascii=False, indent=4)
+        f.write("\n")
+    print(f"✅ 已将模型 {model_name} 写入 {config_path}")
+
+
+def run_benchmark(models: Optional[List[str]] = None, runs: int = 1, threshold: float = 0.9,
+                  config_path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """对已安装的模型逐个做基准测试并推荐最快的达标模型"""
+    if not check_ollama_service():
+        print("❌ Ollama服务未运行")
+        return None
+
+    models = models or [m.get("name") for m in get_available_models()]
+    if not models:
+        print("⚠️  未找到已安装的模型")
+        return None
+
+    results = []
+    for model_name in models:
+        try:
+            results.append(benchmark_model(model_name, runs=runs))
+        except Exception as e:
+            print(f"❌ 模型 {model_name} 测试出错: {e}")
+
+    print("\n📊 基准测试结果:")
+    print(f"   {'模型':<28}{'工具':>7}{'参数':>7}{'prompt tok/s':>14}{'gen tok/s':>11}{'p95 ms':>9}")
+    for r in sorted(results, key=lambda r: r["p95_latency_ms"]):
+        print(f"   {r['model']:<30}{r['tool_accuracy']:>7.0%}{r['argument_accuracy']:>7.0%}"
+              f"{r['prompt_tokens_per_s']:>14.1f}{r['generation_tokens_per_s']:>11.1f}{r['p95_latency_ms']:>9.0f}")
+
+    best = select_fastest_model(results, threshold)
+    if best is None:
+        print(f"\n⚠️  没有模型的准确率达到 {threshold:.0%}")
+        return None
+
+    print(f"\n💡 推荐模型: {best['model']} (p95 {best['p95_latency_ms']:.0f}ms)")
+    if config_path:
+        write_model_to_config(best["model"], config_path)
+    return best
+
+
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description="Ollama安装和配置助手")
+    parser.add_argument("--benchmark", action="store_true", help="对已安装的模型做基准测试并推荐最快的达标模型")
+    parser.add_argument("--models", nargs="*", help="只测试指定的模型")
+    parser.add_argument("--runs", type=int, default=1, help="每条命令的测试轮数")
+    parser.add_argument("--threshold", type=float, default=0.9, help="工具调用和参数准确率阈值")
+    parser.add_argument("--write-config", metavar="PATH", help="把推荐模型写入配置文件, 例如 config.json")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        run_benchmark(args.models, args.runs, args.threshold, args.write_config)
+        return
+
     print_banner()
     
     # 检查Ollama是否已安装
@@ -0,0 +1,189 @@
+import re
+import time
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, Optional, Any
+from loguru import logger
+
+
+NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+def normalize_transcript(text: str) -> str:
+    """归一化转写文本, 用于比较假设和最终结果; 保留数字的负号和小数点"""
+    text = text.lower()
+    text = re.sub(r"(?<!\d)\.|\.(?!\d)", " ", text)
+    text = re.sub(r"-(?!\d)", " ", text)
+    text = re.sub(r"[^\w\s.\-]", " ", text)
+    return " ".join(text.split())
+
+
+def numeric_tokens(text: str) -> list:
+    """提取带符号的数字, 角度、速度等参数必须完全一致"""
+    return NUMBER.findall(text)
+
+
+class SpeculativeExecutor:
+    """推测执行器 - 在转写文本稳定后提前调用Ollama, 最终结果确认后才执行工具调用
+
+    whisper-stream会不断重发逐渐增长的转写文本。当某段文本保持不变超过
+    stable_time秒时, 在后台线程中提前调用call_ollama(只做推理, 不控制电机);
+    当文本保持不变超过final_time秒时视为最终结果。只有最终结果与推测假设一致时
+    才提交推测得到的tool_calls, 否则丢弃并按正常流程重新推理。命中时最多等待推测推理
+    commit_timeout秒, 超时则同样重新推理。
+    """
+
+    def __init__(self, controller, stable_time: float = 0.5, final_time: float = 1.5,
+                 should_speculate: Optional[Callable[[str], bool]] = None, commit_timeout: float = 5.0):
+        if final_time < stable_time:
+            raise ValueError("final_time必须不小于stable_time")
+
+        self.controller = controller
+        self.stable_time = stable_time
+        self.final_time = final_time
+        self.should_speculate = should_speculate or (lambda text: bool(text.strip()))
+        self.commit_timeout = commit_timeout
+
+        self._lock = threading.Lock()
+        self._text = ""
+        self._changed_at = time.monotonic()
+        self._finalized = False
+        # 当前推测: {"key", "text", "started", "finished", "epoch", "future"}
+        self._speculation: Optional[Dict[str, Any]] = None
+
+        self.stats = {
+            "speculations": 0,
+            "hits": 0,
+            "misses": 0,
+            "reruns": 0,
+            "cancelled": 0,
+            "saved_seconds": 0.0
+        }
+
+    def observe(self, text: str, now: Optional[float] = None) -> Optional[str]:
+        """输入一次轮询得到的转写文本, 文本成为最终结果时返回该文本(只返回一次)"""
+        now = time.monotonic() if now is None else now
+        text = text or ""
+
+        if text != self._text:
+            self._text = text
+            self._changed_at = now
+            self._finalized = False
+            return None
+
+        stable_for = now - self._changed_at
+        if stable_for >= self.stable_time and not self._finalized and self.should_speculate(text):
+            self._maybe_speculate(text)
+
+        if stable_for >= self.final_time and not self._finalized:
+            self._finalized = True
+            return text
+        return None
+
+    def _maybe_speculate(self, text: str):
+        """为稳定的文本启动一次推测推理"""
+        key = normalize_transcript(text)
+        with self._lock:
+            if self._speculation is not None:
+                if self._speculation["key"] == key:
+                    return
+                # 文本继续增长, 旧假设作废; 还没开始的推理直接取消, 不占用线程池
+                self.stats["misses"] += 1
+                self._cancel(self._speculation)
+            speculation = {"key": key, "text": text, "started": time.monotonic(), "finished": None,
+                           "epoch": self.controller.cancel_epoch}
+            speculation["future"] = Future()
+            # 每个假设一个线程, 新假设不会排在旧假设的推理后面
+            threading.Thread(target=self._run_speculation, args=(speculation,),
+                             name="speculate", daemon=True).start()
+            self._speculation = speculation
+            self.stats["speculations"] += 1
+
+        logger.debug(f"推测推理开始: {text}")
+
+    def _cancel(self, speculation: Dict[str, Any]):
+        """取消推测推理; 尚未发出请求的直接取消, 已发出的HTTP请求无法中止, 结果会被忽略"""
+        if speculation["future"].cancel():
+            self.stats["cancelled"] += 1
+
+    def _run_speculation(self, speculation: Dict[str, Any]):
+        """后台线程: 只调用模型, 绝不执行工具调用"""
+        future: Future = speculation["future"]
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            response = self.controller.call_ollama(speculation["text"])
+        except Exception as e:
+            future.set_exception(e)
+            return
+        speculation["finished"] = time.monotonic()
+        future.set_result(response)
+
+    def commit(self, command: str) -> Dict[str, Any]:
+        """用最终转写结果确认推测; 命中则执行推测得到的tool_calls, 否则重新推理"""
+        committed_at = time.monotonic()
+        key = normalize_transcript(command)
+
+        with self._lock:
+            speculation = self._speculation
+            self._speculation = None
+
+        # 归一化文本和所有带符号数字都一致才算命中
+        confirmed = (speculation is not None and speculation["key"] == key
+                     and numeric_tokens(speculation["text"]) == numeric_tokens(command))
+        if not confirmed:
+            if speculation is not None:
+                self.stats["misses"] += 1
+                self._cancel(speculation)
+                logger.info(f"推测未命中, 丢弃假设: {speculation['text']}")
+            return self.controller.execute_natural_language_command(command)
+
+        future: Future = speculation["future"]
+        try:
+            response = future.result(timeout=self.commit_timeout)
+        except FutureTimeoutError:
+            # 推测推理卡住时不阻塞主循环, 放弃等待并走正常流程
+            self.stats["reruns"] += 1
+            logger.warning(f"推测推理 {self.commit_timeout}秒内未完成, 重新推理")
+            return self.controller.execute_natural_language_command(command)
+        except Exception as e:
+            self.stats["reruns"] += 1
+            logger.warning(f"推测推理失败, 重新推理: {e}")
+            return self.controller.execute_natural_language_command(command)
+        if "error" in response or not response.get("message", {}).get("tool_calls"):
+            # 推测结果无效, 走带重试的正常流程
+            self.stats["reruns"] += 1
+            logger.info("推测结果无有效function calling, 重新推理")
+            return self.controller.execute_natural_language_command(command)
+
+        duration = speculation["finished"] - speculation["started"]
+        saved = max(0.0, min(duration, committed_at - speculation["started"]))
+        self.stats["hits"] += 1
+        self.stats["saved_seconds"] += saved
+        logger.info(f"推测命中, 节省 {saved * 1000:.0f}ms")
+
+        # 推测开始后发生过急停时不执行
+        result = self.controller.process_ollama_response(response, speculation["epoch"])
+        result["speculative"] = True
+        return result
+
+    def discard(self):
+        """丢弃当前推测 (命令已由快速路径处理)"""
+        with self._lock:
+            if self._speculation is not None:
+                self._cancel(self._speculation)
+            self._speculation = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取推测命中率和节省时间统计"""
+        confirmed = self.stats["hits"] + self.stats["misses"] + self.stats["reruns"]
+        hits = self.stats["hits"]
+        return {
+            **self.stats,
+            "hit_rate": hits / confirmed if confirmed else 0.0,
+            "avg_saved_ms": self.stats["saved_seconds"] * 1000 / hits if hits else 0.0
+        }
+
+    def shutdown(self):
+        """丢弃未确认的推测"""
+        self.discard()
@@ -1,4 +1,4 @@
 from .myactuator_controller_ollama import MyActuatorControllerOllama
+from .emergency_stop import EmergencyStop
 
-__all__ = ["MyActuatorControllerOllama"]
-
+__all__ = ["MyActuatorControllerOllama", "EmergencyStop"]
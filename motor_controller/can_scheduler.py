@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CAN I/O调度器
+独占CAN驱动, 按优先级(急停 > 设定点 > 遥测)串行执行所有电机请求,
+带限速、批处理、总线负载和往返时间统计
+"""
+
+import heapq
+import itertools
+import time
+import threading
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, Iterable, Optional
+from loguru import logger
+
+
+PRIORITY_STOP = 0
+PRIORITY_SETPOINT = 1
+PRIORITY_TELEMETRY = 2
+
+PRIORITY_NAMES = {
+    PRIORITY_STOP: "stop",
+    PRIORITY_SETPOINT: "setpoint",
+    PRIORITY_TELEMETRY: "telemetry"
+}
+
+# ActuatorInterface方法 -> 优先级, 未列出的方法按遥测处理
+METHOD_PRIORITY = {
+    "stopMotor": PRIORITY_STOP,
+    "shutdownMotor": PRIORITY_STOP,
+    "sendPositionAbsoluteSetpoint": PRIORITY_SETPOINT,
+    "sendVelocitySetpoint": PRIORITY_SETPOINT,
+    "sendTorqueSetpoint": PRIORITY_SETPOINT
+}
+
+# 标准帧(11位ID, 8字节数据)最坏情况含位填充和帧间隔约135位; 每个请求为一发一收两帧
+BITS_PER_FRAME = 135
+FRAMES_PER_REQUEST = 2
+
+
+class _TokenBucket:
+    """令牌桶限速"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def delay(self, now: float) -> float:
+        """距离下一个可用令牌的时间, 0表示可以立即执行"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class CanScheduler:
+    """CAN I/O调度器 - 唯一调用ActuatorInterface的线程"""
+
+    def __init__(self, actuators: Dict[str, Any], bitrate: int = 1000000, max_rate: float = 2000.0,
+                 telemetry_rate: float = 100.0, batch_size: int = 8, stats_window: float = 1.0,
+                 report_interval: float = 10.0):
+        self.actuators = actuators
+        self.bitrate = bitrate
+        self.batch_size = batch_size
+        self.stats_window = stats_window
+        self.report_interval = report_interval
+
+        # 总限速保护总线, 遥测单独限速保证不会挤占运动指令; 急停不受限速
+        self._bus_bucket = _TokenBucket(max_rate, max(1.0, batch_size))
+        self._telemetry_bucket = _TokenBucket(telemetry_rate, max(1.0, telemetry_rate / 10))
+
+        self._queue = []
+        self._seq = itertools.count()
+        # 急停闩锁: 设定点带着提交时的epoch, 执行前epoch已变化(中间发生过急停)的设定点被拒绝
+        self.epoch = 0
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+        self._frames = deque()   # (完成时间, 帧数)
+        self._frames_lock = threading.Lock()
+        self.stats = {
+            name: {"count": 0, "cancelled": 0, "errors": 0, "rtt_ms_total": 0.0, "rtt_ms_max": 0.0,
+                   "wait_ms_total": 0.0, "wait_ms_max": 0.0}
+            for name in PRIORITY_NAMES.values()
+        }
+
+    def start(self):
+        """启动I/O线程"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="can-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止I/O线程, 未执行的请求全部取消"""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        self.cancel(PRIORITY_NAMES.keys())
+
+    def submit(self, motor_id: str, method: str, *args, priority: Optional[int] = None,
+               epoch: Optional[int] = None) -> Future:
+        """提交一个电机请求, 返回Future; epoch为发出该请求的命令所属的急停epoch, 默认为当前epoch"""
+        if motor_id not in self.actuators:
+            raise KeyError(f"无效的电机ID: {motor_id}")
+        if priority is None:
+            priority = METHOD_PRIORITY.get(method, PRIORITY_TELEMETRY)
+
+        future = Future()
+        with self._cond:
+            if epoch is None:
+                epoch = self.epoch
+            heapq.heappush(self._queue, (priority, next(self._seq), time.perf_counter(),
+                                         motor_id, method, args, epoch, future))
+            self._cond.notify()
+        return future
+
+    def call(self, motor_id: str, method: str, *args, timeout: Optional[float] = 1.0,
+             epoch: Optional[int] = None) -> Any:
+        """提交请求并等待结果; 超时后取消仍在排队的请求, 不再占用总线"""
+        future = self.submit(motor_id, method, *args, epoch=epoch)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            if future.cancel():
+                priority = METHOD_PRIORITY.get(method, PRIORITY_TELEMETRY)
+                self.stats[PRIORITY_NAMES[priority]]["cancelled"] += 1
+            raise
+
+    def latch(self, epoch: int) -> int:
+        """急停闩锁: 推进epoch并取消排队的设定点和遥测, 之后旧epoch的设定点不再执行; 返回取消数量"""
+        with self._cond:
+            self.epoch = max(self.epoch, epoch)
+        return self.cancel([PRIORITY_SETPOINT, PRIORITY_TELEMETRY])
+
+    def cancel(self, priorities: Iterable[int]) -> int:
+        """取消队列中指定优先级的请求, 返回取消数量"""
+        priorities = set(priorities)
+        with self._cond:
+            kept = [item for item in self._queue if item[0] not in priorities]
+            cancelled = [item for item in self._queue if item[0] in priorities]
+            heapq.heapify(kept)
+            self._queue = kept
+        for item in cancelled:
+            item[-1].cancel()
+            self.stats[PRIORITY_NAMES[item[0]]]["cancelled"] += 1
+        return len(cancelled)
+
+    def _take_batch(self):
+        """按优先级取出最多batch_size个请求; 被限速时返回需要等待的时间"""
+        now = time.monotonic()
+        batch = []
+        while self._queue and len(batch) < self.batch_size:
+            priority = self._queue[0][0]
+            if priority != PRIORITY_STOP:
+                delay = self._bus_bucket.delay(now)
+                if priority == PRIORITY_TELEMETRY:
+                    delay = max(delay, self._telemetry_bucket.delay(now))
+                if delay > 0:
+                    return batch, delay
+                self._bus_bucket.take()
+                if priority == PRIORITY_TELEMETRY:
+                    self._telemetry_bucket.take()
+            batch.append(heapq.heappop(self._queue))
+        return batch, 0.0
+
+    def _run(self):
+        last_report = time.monotonic()
+        while True:
+            now = time.monotonic()
+            if self.report_interval and now - last_report >= self.report_interval:
+                last_report = now
+                logger.debug(f"CAN调度统计: {self.get_stats()}")
+
+            with self._cond:
+                if self._running and not self._queue:
+                    self._cond.wait(timeout=self.report_interval or None)
+                if not self._running:
+                    return
+                batch, delay = self._take_batch()
+                if not batch:
+                    # 被限速时等待令牌, 期间有新请求(如急停)会被唤醒
+                    if delay > 0:
+                        self._cond.wait(timeout=delay)
+                    continue
+
+            for index, item in enumerate(batch):
+                self._execute(item)
+                # 执行批次时有更高优先级的请求进来, 剩余请求放回队列
+                rest = batch[index + 1:]
+                if not rest:
+                    continue
+                # cancel()(急停闩锁)会替换self._queue, 必须在锁内对同一个列表判断和放回
+                with self._cond:
+                    queue = self._queue
+                    preempted = bool(queue) and queue[0][0] < rest[0][0]
+                    if preempted:
+                        for pending in rest:
+                            heapq.heappush(queue, pending)
+                if preempted:
+                    break
+
+    def _execute(self, item):
+        priority, _, submitted, motor_id, method, args, epoch, future = item
+        stats = self.stats[PRIORITY_NAMES[priority]]
+        if priority == PRIORITY_SETPOINT and epoch < self.epoch:
+            # 提交后发生过急停: 即使发送方在急停前检查过取消状态, 也不会在stopMotor之后再动
+            if future.cancel():
+                stats["cancelled"] += 1
+            return
+        if not future.set_running_or_notify_cancel():
+            return
+
+        start = time.perf_counter()
+        try:
+            result = getattr(self.actuators[motor_id], method)(*args)
+        except Exception as e:
+            stats["errors"] += 1
+            future.set_exception(e)
+            result = None
+        end = time.perf_counter()
+
+        wait_ms = (start - submitted) * 1000
+        rtt_ms = (end - start) * 1000
+        stats["count"] += 1
+        stats["wait_ms_total"] += wait_ms
+        stats["wait_ms_max"] = max(stats["wait_ms_max"], wait_ms)
+        stats["rtt_ms_total"] += rtt_ms
+        stats["rtt_ms_max"] = max(stats["rtt_ms_max"], rtt_ms)
+        with self._frames_lock:
+            self._frames.append((end, FRAMES_PER_REQUEST))
+
+        if not future.done():
+            future.set_result(result)
+
+    def bus_load(self) -> float:
+        """最近stats_window秒内的估算总线负载 [0, 1]"""
+        now = time.perf_counter()
+        with self._frames_lock:
+            while self._frames and now - self._frames[0][0] > self.stats_window:
+                self._frames.popleft()
+            bits = sum(frames for _, frames in self._frames) * BITS_PER_FRAME
+        return bits / (self.bitrate * self.stats_window)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """总线负载、队列深度和各优先级的往返时间统计"""
+        classes = {}
+        for name, s in self.stats.items():
+            count = s["count"]
+            classes[name] = {
+                "count": count,
+                "cancelled": s["cancelled"],
+                "errors": s["errors"],
+                "rtt_ms_avg": s["rtt_ms_total"] / count if count else 0.0,
+                "rtt_ms_max": s["rtt_ms_max"],
+                "wait_ms_avg": s["wait_ms_total"] / count if count else 0.0,
+                "wait_ms_max": s["wait_ms_max"]
+            }
+        return {
+            "bus_load": self.bus_load(),
+            "queue_depth": len(self._queue),
+            "classes": classes
+        }
+
+
+class ScheduledActuator:
+    """经调度器访问的电机接口, 方法名与rmd.ActuatorInterface一致"""
+
+    def __init__(self, scheduler: CanScheduler, motor_id: str, timeout: Optional[float] = 1.0):
+        self._scheduler = scheduler
+        self._motor_id = motor_id
+        self._timeout = timeout
+
+    def __getattr__(self, method: str):
+        if method.startswith("_"):
+            raise AttributeError(method)
+
+        def _call(*args, epoch: Optional[int] = None):
+            return self._scheduler.call(self._motor_id, method, *args, timeout=self._timeout, epoch=epoch)
+
+        return _call
@@ -0,0 +1,142 @@
+import re
+import time
+import threading
+from concurrent.futures import Future
+from difflib import SequenceMatcher
+from typing import Callable, Dict, List, Optional, Any, Tuple
+from loguru import logger
+
+from llm.speculative import normalize_transcript, numeric_tokens
+
+
+# 方向和电机只差一个词时整体相似度仍然很高 ("left by 30" / "right by 30" 约0.91), 必须逐项比较
+DIRECTION = re.compile(
+    r"\b(?:counterclockwise|anticlockwise|clockwise|left|right|up|down|forwards?|backwards?|back|reverse)\b"
+    r"|逆时针|顺时针|向左|向右|向上|向下|正转|反转"
+)
+MOTOR = re.compile(r"\bmotor[\s_]*(\w+)|电机\s*(\w)|(\w)\s*号电机")
+
+
+class TranscriptDeduper:
+    """转写去重 - 时间窗口内与已执行命令相似的转写视为重复, 窗口外的完全重复视为新命令
+
+    轮询到的同一条ASR结果也由窗口判断: 窗口内重复出现会被忽略, 超过窗口后再次出现按新命令执行。
+    """
+
+    def __init__(self, window: float = 5.0, threshold: float = 0.85):
+        self.window = window
+        self.threshold = threshold
+        self._recent: List[Tuple[float, str]] = []
+        self.stats = {"accepted": 0, "duplicates": 0}
+
+    def similarity(self, a: str, b: str) -> float:
+        """两条归一化转写的相似度 [0, 1]; 带符号的数字、方向词或电机不同的命令不算相似"""
+        if numeric_tokens(a) != numeric_tokens(b):
+            return 0.0
+        if DIRECTION.findall(a) != DIRECTION.findall(b):
+            return 0.0
+        if MOTOR.findall(a) != MOTOR.findall(b):
+            return 0.0
+        return SequenceMatcher(None, a, b).ratio()
+
+    def accept(self, text: str, now: Optional[float] = None) -> bool:
+        """返回True表示应当执行该转写"""
+        now = time.monotonic() if now is None else now
+        key = normalize_transcript(text)
+        self._recent = [(t, k) for t, k in self._recent if now - t <= self.window]
+
+        for t, k in self._recent:
+            score = self.similarity(key, k)
+            if score >= self.threshold:
+                self.stats["duplicates"] += 1
+                logger.info(f"忽略重复转写 (相似度 {score:.2f}, {now - t:.1f}秒前): {text}")
+                return False
+
+        self._recent.append((now, key))
+        self.stats["accepted"] += 1
+        return True
+
+
+class SetpointCoalescer:
+    """设定点合并 - 同一电机待发送的设定点只保留最新的一个, 由后台线程统一下发
+
+    submit返回Future: 下发成功为True, 被同一电机更新的设定点覆盖为False,
+    下发失败时带有发送异常, 被clear()丢弃时为已取消。
+    """
+
+    def __init__(self, send: Callable[..., Any], hold: float = 0.02):
+        self.send = send
+        self.hold = hold
+
+        self._pending: Dict[str, Tuple[float, float, Optional[int], Future]] = {}
+        self._generation = 0
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"submitted": 0, "sent": 0, "coalesced": 0, "dropped": 0}
+
+    def start(self):
+        """启动下发线程"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="setpoint-coalescer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止下发线程"""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+
+    def submit(self, motor_id: str, angle: float, speed: float, epoch: Optional[int] = None) -> Future:
+        """提交设定点; 尚未下发的同一电机设定点会被覆盖 (latest wins); epoch随设定点一起下发"""
+        future = Future()
+        with self._cond:
+            if motor_id in self._pending:
+                self.stats["coalesced"] += 1
+                self._pending[motor_id][3].set_result(False)
+            self._pending[motor_id] = (angle, speed, epoch, future)
+            self.stats["submitted"] += 1
+            self._cond.notify()
+        return future
+
+    def clear(self):
+        """丢弃所有未下发的设定点 (急停时调用)"""
+        with self._cond:
+            self.stats["dropped"] += len(self._pending)
+            for _, _, _, future in self._pending.values():
+                future.cancel()
+            self._pending.clear()
+            self._generation += 1
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and not self._pending:
+                    self._cond.wait()
+                if not self._running:
+                    return
+            # 短暂等待, 把同一批突发的设定点合并后再下发
+            if self.hold > 0:
+                time.sleep(self.hold)
+            with self._cond:
+                batch = self._pending
+                self._pending = {}
+                generation = self._generation
+
+            for motor_id, (angle, speed, epoch, future) in batch.items():
+                # 下发过程中被clear()时, 剩余设定点不再下发
+                if generation != self._generation:
+                    self.stats["dropped"] += 1
+                    future.cancel()
+                    continue
+                try:
+                    self.send(motor_id, angle, speed, epoch=epoch)
+                    self.stats["sent"] += 1
+                    future.set_result(True)
+                except Exception as e:
+                    logger.error(f"下发电机 {motor_id} 设定点失败: {e}")
+                    future.set_exception(e)
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+急停通道
+在高优先级线程中直接停止所有电机, 不经过ASR轮询和大模型流程
+"""
+
+import os
+import re
+import time
+import threading
+from typing import Callable, Dict, List, Optional, Any
+from loguru import logger
+
+
+DEFAULT_KEYWORDS = [
+    r"\bstop\b",
+    r"\bhalt\b",
+    r"\bfreeze\b",
+    r"\bemergency\b",
+    r"停"
+]
+
+
+class EmergencyStop:
+    """急停 - 关键词命中后由高优先级线程取消所有命令并向每个电机发送stopMotor"""
+
+    def __init__(self, controller, keywords: Optional[List[str]] = None, bound_ms: float = 50.0,
+                 refractory: float = 1.0, priority: int = 80):
+        self.controller = controller
+        self.pattern = re.compile("|".join(keywords or DEFAULT_KEYWORDS), re.IGNORECASE)
+        self.bound_ms = bound_ms
+        self.refractory = refractory
+        self.priority = priority
+
+        self.latencies_ms: List[float] = []
+        self.last_event: Optional[Dict[str, Any]] = None
+
+        self._event = threading.Event()
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._pending: Optional[Dict[str, Any]] = None
+        self._last_trigger: Optional[float] = None
+        self._last_text = ""
+        self._last_count = 0
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._watcher: Optional[threading.Thread] = None
+
+    def start(self):
+        """启动急停线程"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="emergency-stop", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止急停线程和转写监视线程"""
+        self._running = False
+        self._event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+
+    def _set_realtime_priority(self):
+        """尽量把当前线程设为SCHED_FIFO实时优先级 (需要CAP_SYS_NICE)"""
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(self.priority))
+            logger.info(f"急停线程使用SCHED_FIFO优先级 {self.priority}")
+        except (AttributeError, PermissionError, OSError) as e:
+            logger.warning(f"无法设置急停线程实时优先级, 使用普通优先级: {e}")
+
+    def _run(self):
+        self._set_realtime_priority()
+        while self._running:
+            self._event.wait()
+            if not self._running:
+                break
+            with self._lock:
+                pending = self._pending
+                self._pending = None
+                self._event.clear()
+            if pending is not None:
+                self._execute(pending)
+
+    def _execute(self, pending: Dict[str, Any]):
+        # 先取消排队和进行中的命令, 保证stopMotor之后不会再有其他指令下发
+        self.controller.cancel_pending()
+        result = self.controller.stop_all_motors()
+        latency_ms = (time.perf_counter() - pending["triggered"]) * 1000
+
+        self.latencies_ms.append(latency_ms)
+        self.last_event = {**pending, "latency_ms": latency_ms, "result": result}
+        if latency_ms > self.bound_ms:
+            logger.warning(f"急停耗时 {latency_ms:.2f}ms, 超过上限 {self.bound_ms}ms (来源: {pending['source']})")
+        else:
+            logger.warning(f"急停完成, 耗时 {latency_ms:.2f}ms (来源: {pending['source']})")
+        if not result["success"]:
+            logger.error(f"部分电机急停失败: {result['results']}")
+        self._done.set()
+
+    def trigger(self, source: str = "manual"):
+        """触发急停; 只唤醒急停线程, 立即返回"""
+        now = time.perf_counter()
+        with self._lock:
+            self._last_trigger = now
+            self._done.clear()
+            self._pending = {"source": source, "triggered": now}
+        self._event.set()
+
+    def _in_refractory(self) -> bool:
+        return self._last_trigger is not None and time.perf_counter() - self._last_trigger < self.refractory
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """等待最近一次急停执行完成"""
+        return self._done.wait(timeout)
+
+    def check(self, text: str, source: str = "transcript") -> bool:
+        """检查转写文本(包括未完成的部分结果), 出现新的急停关键词时触发急停"""
+        if not text:
+            return False
+        count = len(self.pattern.findall(text))
+        # whisper-stream会重发逐渐增长的文本, 只有新出现的关键词才触发
+        previous = self._last_count if text.startswith(self._last_text) else 0
+        self._last_text = text
+        self._last_count = count
+        if count <= previous or self._in_refractory():
+            return False
+
+        self.trigger(source)
+        return True
+
+    def matches(self, command: str) -> bool:
+        """命令是否包含急停关键词; 这类命令不经过去重, 重复的急停也必须执行"""
+        return bool(self.pattern.search(command or ""))
+
+    def try_handle(self, command: str) -> Optional[Dict[str, Any]]:
+        """作为快速路径: 命令包含急停关键词时不交给大模型"""
+        if not self.matches(command):
+            return None
+        if not self._in_refractory():
+            self.trigger("command")
+            self.wait(timeout=1)
+        return {"success": True, "emergency_stop": True, "event": self.last_event}
+
+    def watch(self, source: Callable[[], str], interval: float = 0.05):
+        """在独立线程中高频轮询部分转写结果, 不受主循环和大模型调用阻塞"""
+        def _watch():
+            while self._running:
+                try:
+                    self.check(source(), source="partial")
+                except Exception as e:
+                    logger.error(f"急停监视失败: {e}")
+                time.sleep(interval)
+
+        self._watcher = threading.Thread(target=_watch, name="emergency-stop-watch", daemon=True)
+        self._watcher.start()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """急停延迟统计"""
+        latencies = sorted(self.latencies_ms)
+        if not latencies:
+            return {"count": 0, "bound_ms": self.bound_ms}
+        return {
+            "count": len(latencies),
+            "bound_ms": self.bound_ms,
+            "p50_ms": latencies[len(latencies) // 2],
+            "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+            "max_ms": latencies[-1],
+            "violations": sum(1 for x in latencies if x > self.bound_ms)
+        }
+
+
+def measure_worst_case(trials: int = 1000, bound_ms: float = 50.0, stop_delay: float = 0.0005,
+                       controller=None) -> Dict[str, Any]:
+    """在设定点和CPU负载下测量急停通道的最坏延迟
+
+    默认使用MyActuatorControllerOllama和模拟电机, 急停经过与实际运行相同的取消闩锁和CAN调度器;
+    也可以传入已连接的控制器(如out_of_process的电机进程)。stop_delay为模拟电机每次调用的耗时。
+    """
+    owned = controller is None
+    if owned:
+        from motor_controller.myactuator_controller_ollama import MyActuatorControllerOllama
+
+        class _FakeActuator:
+            def sendPositionAbsoluteSetpoint(self, angle, speed):
+                time.sleep(stop_delay)
+
+            def stopMotor(self):
+                time.sleep(stop_delay)
+
+        controller = MyActuatorControllerOllama("benchmark", connect=False)
+        controller.attach({motor_id: _FakeActuator() for motor_id in controller.motor_ids})
+
+    # 有CPU密集线程时, 延迟主要来自GIL切换间隔 (默认5ms, 每次stopMotor释放GIL后都要重新竞争)
+    estop = EmergencyStop(controller, bound_ms=bound_ms)
+    estop.start()
+    busy = threading.Event()
+
+    def _load():
+        # 背景负载: 模拟LLM路径中的JSON解析占用GIL
+        while not busy.is_set():
+            sum(i * i for i in range(2000))
+
+    def _setpoints():
+        # 持续下发设定点, 急停需要越过排队中的运动指令
+        angle = 0
+        while not busy.is_set():
+            for motor_id in controller.motor_ids:
+                controller.control_motor(motor_id, angle % 90)
+            angle += 1
+            time.sleep(0.001)
+
+    threads = [threading.Thread(target=target, daemon=True) for target in (_load, _setpoints)]
+    for thread in threads:
+        thread.start()
+    try:
+        for _ in range(trials):
+            estop.trigger("benchmark")
+            estop.wait(timeout=1)
+            time.sleep(0.001)
+    finally:
+        busy.set()
+        estop.stop()
+        for thread in threads:
+            thread.join(timeout=1)
+        if owned:
+            controller.setpoints.stop()
+            controller.scheduler.stop()
+    return estop.get_stats()
+
+
+if __name__ == "__main__":
+    stats = measure_worst_case()
+    print(stats)
+    if stats["max_ms"] > stats["bound_ms"]:
+        raise SystemExit(f"worst-case latency {stats['max_ms']:.2f}ms exceeds bound {stats['bound_ms']}ms")
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+手势/宏库
+配置中的命名手势在启动时编译为定时设定点序列, 由专用计时线程执行, 不需要逐步调用大模型
+"""
+
+import re
+import time
+import queue
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from loguru import logger
+
+
+# 编译后的步骤: (相对开始时间秒, 电机ID, 目标角度, 速度)
+Step = Tuple[float, str, float, float]
+
+DEFAULT_SPEED = 300.0
+# 距离目标时间小于该值时改为忙等, 避免sleep的唤醒误差
+SPIN_THRESHOLD = 0.002
+
+
+def compile_gestures(config: Dict[str, Any], motor_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """把配置中的手势编译为按时间排序的设定点序列
+
+    每个手势: {"description", "keywords", "repeat", "period", "steps": [{"t", "motor_id", "angle", "speed"}]}
+    motor_id为"all"时展开为所有电机; repeat次重复之间间隔period秒, repeat大于1时period必须指定,
+    且必须大于最后一步的时间, 否则上一次的最后一步会和下一次的第一步重叠。
+    """
+    gestures = {}
+    for name, spec in (config or {}).items():
+        repeat = int(spec.get("repeat", 1))
+        raw_steps = spec.get("steps", [])
+        if not raw_steps:
+            raise ValueError(f"手势 {name} 没有步骤")
+        last = max(float(s["t"]) for s in raw_steps)
+        if repeat > 1 and "period" not in spec:
+            raise ValueError(f"手势 {name} 重复{repeat}次, 必须指定period")
+        period = float(spec.get("period", last))
+        if repeat > 1 and period <= last:
+            raise ValueError(f"手势 {name} 的period必须大于最后一步的时间 {last}秒")
+
+        steps: List[Step] = []
+        for i in range(repeat):
+            for s in raw_steps:
+                targets = motor_ids if s["motor_id"] == "all" else [s["motor_id"]]
+                for motor_id in targets:
+                    if motor_id not in motor_ids:
+                        raise ValueError(f"手势 {name} 使用了无效的电机ID: {motor_id}")
+                    speed = float(s.get("speed", spec.get("speed", DEFAULT_SPEED)))
+                    if not 1 <= speed <= 800:
+                        raise ValueError(f"手势 {name} 的速度必须在1到800度/秒之间")
+                    steps.append((i * period + float(s["t"]), motor_id, float(s["angle"]), speed))
+        steps.sort(key=lambda step: step[0])
+
+        gestures[name] = {
+            "name": name,
+            "description": spec.get("description", name),
+            "keywords": spec.get("keywords", [name]),
+            "steps": steps,
+            "duration": steps[-1][0]
+        }
+    return gestures
+
+
+class GesturePlayer:
+    """手势执行器 - 在计时线程中按绝对时间表下发设定点, 并统计执行抖动"""
+
+    def __init__(self, gestures: Dict[str, Dict[str, Any]], send: Callable[..., Any],
+                 epoch_source: Optional[Callable[[], int]] = None):
+        """send(motor_id, angle, speed, epoch=...); epoch_source返回play时的急停epoch, 随每一步设定点下发"""
+        self.gestures = gestures
+        self.send = send
+        self.epoch_source = epoch_source
+
+        keywords = [(re.escape(k), name) for name, g in gestures.items() for k in g["keywords"]]
+        self._keywords = [(re.compile(rf"\b{k}\b" if k.isascii() else k, re.IGNORECASE), name)
+                          for k, name in keywords]
+
+        self._queue: "queue.Queue[Optional[Tuple[str, threading.Event, Optional[int]]]]" = queue.Queue()
+        self._cancel = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.jitter_ms: Dict[str, List[float]] = {name: [] for name in gestures}
+        self.last_run: Optional[Dict[str, Any]] = None
+
+    def start(self):
+        """启动计时线程"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="gesture-player", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止计时线程"""
+        self.cancel()
+        self._queue.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+
+    def play(self, name: str, wait: bool = False) -> Dict[str, Any]:
+        """执行指定手势; wait为True时等待手势执行完成"""
+        if name not in self.gestures:
+            return {"success": False, "error": f"未知手势: {name}"}
+
+        done = threading.Event()
+        epoch = self.epoch_source() if self.epoch_source is not None else None
+        self._cancel.clear()
+        self._queue.put((name, done, epoch))
+        if wait:
+            done.wait()
+            return {"success": True, "gesture": name, "run": self.last_run}
+        return {
+            "success": True,
+            "gesture": name,
+            "message": f"开始执行手势 {name}, 共 {len(self.gestures[name]['steps'])} 步"
+        }
+
+    def cancel(self):
+        """中止正在执行和排队的手势 (急停时调用)"""
+        self._cancel.set()
+        try:
+            while True:
+                item = self._queue.get_nowait()
+                if item is not None:
+                    item[1].set()
+        except queue.Empty:
+            pass
+
+    def match(self, command: str) -> Optional[str]:
+        """关键词匹配手势名称"""
+        for pattern, name in self._keywords:
+            if pattern.search(command or ""):
+                return name
+        return None
+
+    def try_handle(self, command: str) -> Optional[Dict[str, Any]]:
+        """作为快速路径: 命令包含手势关键词时直接执行, 不经过大模型"""
+        name = self.match(command)
+        if name is None:
+            return None
+        return self.play(name)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            name, done, epoch = item
+            try:
+                self._execute(self.gestures[name], epoch)
+            except Exception as e:
+                logger.error(f"执行手势 {name} 失败: {e}")
+            finally:
+                done.set()
+
+    def _execute(self, gesture: Dict[str, Any], epoch: Optional[int] = None):
+        jitter = []
+        start = time.perf_counter()
+        for offset, motor_id, angle, speed in gesture["steps"]:
+            target = start + offset
+            while True:
+                remaining = target - time.perf_counter()
+                if remaining <= 0 or self._cancel.is_set():
+                    break
+                if remaining > SPIN_THRESHOLD:
+                    # 提前醒来, 剩余时间忙等
+                    self._cancel.wait(remaining - SPIN_THRESHOLD)
+            if self._cancel.is_set():
+                logger.warning(f"手势 {gesture['name']} 已取消")
+                break
+            jitter.append((time.perf_counter() - target) * 1000)
+            self.send(motor_id, angle, speed, epoch=epoch)
+
+        self.jitter_ms[gesture["name"]].extend(jitter)
+        self.last_run = {
+            "gesture": gesture["name"],
+            "steps": len(jitter),
+            "cancelled": self._cancel.is_set(),
+            "jitter_ms_avg": sum(jitter) / len(jitter) if jitter else 0.0,
+            "jitter_ms_max": max(jitter) if jitter else 0.0
+        }
+        logger.info(f"手势 {gesture['name']} 完成 {len(jitter)} 步, 抖动 平均 {self.last_run['jitter_ms_avg']:.2f}ms "
+                    f"最大 {self.last_run['jitter_ms_max']:.2f}ms")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """各手势的执行抖动统计"""
+        stats = {}
+        for name, values in self.jitter_ms.items():
+            if not values:
+                continue
+            ordered = sorted(values)
+            stats[name] = {
+                "steps": len(ordered),
+                "jitter_ms_avg": sum(ordered) / len(ordered),
+                "jitter_ms_p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                "jitter_ms_max": ordered[-1]
+            }
+        return stats
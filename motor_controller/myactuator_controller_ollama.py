@@ -1,7 +1,10 @@
 
 from llm.ollama_motor_controller import OllamaMotorController
-import myactuator_rmd_py as rmd
+from motor_controller.coalescer import SetpointCoalescer
+from motor_controller.can_scheduler import CanScheduler, ScheduledActuator
+from motor_controller.gestures import GesturePlayer, compile_gestures
 import time
+from concurrent.futures import CancelledError, Future, TimeoutError as FutureTimeoutError
 from loguru import logger
 from typing import Dict, List, Optional, Any
 
@@ -9,16 +12,116 @@ from typing import Dict, List, Optional, Any
 class MyActuatorControllerOllama(OllamaMotorController):
     """MyActuator电机控制器，继承自OllamaMotorController"""
     
-    def __init__(self, model: str, base_url: str = "http://localhost:11434", port: str = "can0"):
+    def __init__(self, model: str, base_url: str = "http://localhost:11434", port: str = "can0",
+                 connect: bool = True, scheduler_options: Optional[Dict[str, Any]] = None,
+                 out_of_process: bool = False, gestures: Optional[Dict[str, Any]] = None):
         super().__init__(model, base_url)
 
-        self.driver = rmd.CanDriver(port)
-        self.motors = {
-            "motor_1": rmd.ActuatorInterface(self.driver, 1),
-            "motor_2": rmd.ActuatorInterface(self.driver, 2),
-            "motor_3": rmd.ActuatorInterface(self.driver, 3)
+        self.port = port
+        self.motor_ids = {"motor_1": 1, "motor_2": 2, "motor_3": 3}
+        self.scheduler_options = scheduler_options or {}
+        self.out_of_process = out_of_process
+        self.driver = None
+        self.scheduler = None
+        self.motors = {}
+        # 同一电机未下发的设定点只保留最新的一个
+        self.setpoints = SetpointCoalescer(self._send_setpoint)
+        # control_motor等待设定点下发结果的时间: 合并等待加上一次CAN往返的超时
+        self.setpoint_timeout = 2.0
+        self.cancel_hooks.append(self.setpoints.clear)
+
+        # 手势在启动时编译一次, 由计时线程直接下发设定点 (与control_motor相同的角度方向)
+        self.gesture_player = None
+        if gestures:
+            compiled = compile_gestures(gestures, list(self.motor_ids))
+            self.gesture_player = GesturePlayer(
+                compiled,
+                lambda motor_id, angle, speed, epoch=None: self._send_setpoint(motor_id, -angle, speed, epoch),
+                epoch_source=self.current_epoch)
+            self.cancel_hooks.append(self.gesture_player.cancel)
+            self.tools.append(self._gesture_tool(compiled))
+            self.gesture_player.start()
+
+        if connect:
+            self.connect()
+
+    def connect(self):
+        """打开CAN驱动并创建电机接口 (首次调用时才导入myactuator_rmd_py)"""
+        if self.out_of_process:
+            self._connect_process()
+            return
+
+        import myactuator_rmd_py as rmd
+
+        self.driver = rmd.CanDriver(self.port)
+        self.attach({
+            motor_id: rmd.ActuatorInterface(self.driver, can_id)
+            for motor_id, can_id in self.motor_ids.items()
+        })
+
+    def attach(self, actuators: Dict[str, Any]):
+        """用给定的电机接口(ActuatorInterface或模拟电机)启动调度器"""
+        # 所有CAN访问都由调度器线程按优先级执行
+        self.scheduler = CanScheduler(actuators, **self.scheduler_options)
+        self.scheduler.start()
+        self.cancel_hooks.append(lambda: self.scheduler.latch(self.cancel_epoch))
+        self.motors = {motor_id: ScheduledActuator(self.scheduler, motor_id) for motor_id in actuators}
+        self.setpoints.start()
+
+    def _connect_process(self):
+        """在独立进程中打开CAN驱动, self.motors为共享内存代理"""
+        from motor_controller.shm_driver import ShmMotorDriver, ShmActuatorProxy
+
+        self.driver = ShmMotorDriver(self.port, self.motor_ids, self.scheduler_options)
+        self.driver.start()
+        self.cancel_hooks.append(lambda: self.driver.cancel(self.cancel_epoch))
+        self.motors = {motor_id: ShmActuatorProxy(self.driver, motor_id) for motor_id in self.motor_ids}
+        self.setpoints.start()
+
+    def _gesture_tool(self, gestures: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """run_gesture工具定义, 可选手势来自配置"""
+        descriptions = ", ".join(f"{name}: {g['description']}" for name, g in gestures.items())
+        return {
+            "type": "function",
+            "function": {
+                "name": "run_gesture",
+                "description": f"执行预定义的多步动作 ({descriptions})",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "name": {
+                            "type": "string",
+                            "description": "手势名称",
+                            "enum": list(gestures)
+                        }
+                    },
+                    "required": ["name"]
+                }
+            }
         }
 
+    def run_gesture(self, name: str) -> Dict[str, Any]:
+        """执行预定义手势"""
+        if self.gesture_player is None:
+            return super().run_gesture(name)
+        logger.info(f"执行手势 {name}")
+        return self.gesture_player.play(name)
+
+    def _send_setpoint(self, motor_id: str, angle: float, speed: float, epoch: Optional[int] = None):
+        """向电机下发绝对位置设定点; epoch为发出该设定点的命令所属的急停epoch"""
+        self.motors[motor_id].sendPositionAbsoluteSetpoint(angle, speed, epoch=epoch)
+
+    def handshake(self) -> Dict[str, Any]:
+        """逐个查询电机状态, 确认电机在CAN总线上有响应"""
+        results = {}
+        for motor_id, actuator in self.motors.items():
+            try:
+                status = actuator.getMotorStatus1()
+                results[motor_id] = {"success": True, "error_code": status.error_code}
+            except Exception as e:
+                results[motor_id] = {"success": False, "error": str(e)}
+        return results
+
     def control_motor(self, motor_id: str, angle: float, speed: float = 300) -> dict[str, any]:
         """控制电机旋转到指定角度"""
         if motor_id not in self.motors:
@@ -27,8 +130,12 @@ class MyActuatorControllerOllama(OllamaMotorController):
             return {"success": False, "error": "速度必须在1到800度/秒之间"}
 
         logger.info(f"控制电机 {motor_id} 旋转到 {angle}度，速度 {speed}度/秒")
-        motor_id = "motor_1"
-        self.motors[motor_id].sendPositionAbsoluteSetpoint(-angle, speed)
+        future = self.setpoints.submit(motor_id, -angle, speed, epoch=self.current_epoch())
+        # 等待实际下发: 发送失败或超时照常抛出异常, 由process_ollama_response按失败重试
+        try:
+            sent = future.result(timeout=self.setpoint_timeout)
+        except CancelledError:
+            return {"success": False, "cancelled": True, "error": "设定点已被急停取消"}
         # time.sleep(3)  # Wait for motor to reach target position
 
         return {
@@ -36,7 +143,8 @@ class MyActuatorControllerOllama(OllamaMotorController):
             "motor_id": motor_id,
             "target_angle": angle,
             "speed": speed,
-            "message": f"电机 {motor_id} 开始旋转到 {angle}度"
+            "message": f"电机 {motor_id} 开始旋转到 {angle}度" if sent
+                       else f"电机 {motor_id} 的设定点已被更新的设定点覆盖"
         }
 
     def get_motor_status(self, motor_id: str) -> Dict[str, Any]:
@@ -89,3 +197,34 @@ class MyActuatorControllerOllama(OllamaMotorController):
             "motor_id": motor_id,
             "message": f"电机 {motor_id} 已停止"
         }
+
+    def _submit_stop(self, motor_id: str) -> Future:
+        """提交stopMotor, 不等待结果"""
+        if self.scheduler is not None:
+            return self.scheduler.submit(motor_id, "stopMotor")
+        from motor_controller.shm_driver import OP_STOP
+        return self.driver.submit(motor_id, OP_STOP)
+
+    def stop_all_motors(self, timeout: float = 1.0) -> Dict[str, Any]:
+        """先向所有电机提交stopMotor再统一等待, 总等待不超过timeout秒; 单个电机失败不影响其他电机"""
+        results = {}
+        futures = {}
+        for motor_id in self.motors:
+            try:
+                futures[motor_id] = self._submit_stop(motor_id)
+            except Exception as e:
+                results[motor_id] = {"success": False, "error": str(e)}
+
+        deadline = time.perf_counter() + timeout
+        for motor_id, future in futures.items():
+            try:
+                future.result(timeout=max(0.0, deadline - time.perf_counter()))
+                results[motor_id] = {"success": True}
+            except FutureTimeoutError:
+                results[motor_id] = {"success": False, "error": f"stopMotor超时 ({timeout}秒)"}
+            except Exception as e:
+                results[motor_id] = {"success": False, "error": str(e)}
+        return {
+            "success": all(r["success"] for r in results.values()),
+            "results": results
+        }
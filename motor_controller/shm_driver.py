@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+独立进程电机驱动
+myactuator_rmd_py的阻塞调用放到单独的进程中执行, 主进程的GIL占用和GC停顿不会影响电机控制。
+两个进程通过multiprocessing.shared_memory中的单生产者单消费者环形缓冲区交换定长二进制记录,
+热路径上没有pickle; 每写入一条记录释放一次信号量, 消费端阻塞等待而不是轮询。
+"""
+
+import gc
+import itertools
+import struct
+import threading
+import time
+import multiprocessing
+from concurrent.futures import CancelledError, Future, TimeoutError as FutureTimeoutError
+from multiprocessing import shared_memory
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+from loguru import logger
+
+
+OP_SHUTDOWN = 0
+OP_SETPOINT = 1
+OP_STOP = 2
+OP_STATUS1 = 3
+OP_STATUS2 = 4
+OP_STATUS3 = 5
+OP_CANCEL = 6
+# 取消单个请求, 命令中的请求ID为要取消的请求
+OP_ABORT = 7
+
+OP_METHODS = {
+    OP_SETPOINT: "sendPositionAbsoluteSetpoint",
+    OP_STOP: "stopMotor",
+    OP_STATUS1: "getMotorStatus1",
+    OP_STATUS2: "getMotorStatus2",
+    OP_STATUS3: "getMotorStatus3"
+}
+
+# 状态结构体字段, 按顺序打包为double
+STATUS_FIELDS = {
+    OP_STATUS1: ("temperature", "is_brake_released", "voltage", "error_code"),
+    OP_STATUS2: ("temperature", "current", "shaft_speed", "shaft_angle"),
+    OP_STATUS3: ("temperature", "current_phase_a", "current_phase_b", "current_phase_c")
+}
+# 非float的状态字段; 代理一侧按此还原类型, 与ActuatorInterface返回的结构体一致
+STATUS_TYPES = {
+    "temperature": int,
+    "is_brake_released": bool,
+    "error_code": int
+}
+
+# 命令: 请求ID, 操作, 电机序号, 两个参数, 急停epoch+1 (0表示未指定)
+COMMAND = struct.Struct("<QBBxxxxxxddQ")
+# 结果: 请求ID, 操作, 状态(RESULT_*), 往返时间(ms), 4个状态值
+RESULT = struct.Struct("<QBBxxxxxxd4d")
+RESULT_FAILED = 0
+RESULT_OK = 1
+RESULT_CANCELLED = 2
+
+
+class ShmRing:
+    """共享内存中的单生产者单消费者环形缓冲区
+
+    头部: head(生产者写)和tail(消费者写)各占一个缓存行。每个槽位以序号开头,
+    生产者先写负载再写序号, 消费者看到序号等于期望值后才读取负载, 因此两端都不需要锁。
+    """
+
+    HEADER = 128
+    INDEX = struct.Struct("<Q")
+
+    def __init__(self, record: struct.Struct, capacity: int = 256, name: Optional[str] = None):
+        self.record = record
+        self.capacity = capacity
+        self.slot_size = self.INDEX.size + record.size
+        size = self.HEADER + self.slot_size * capacity
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            self.shm.buf[:size] = bytes(size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.buf = self.shm.buf
+        self.name = self.shm.name
+
+    def _head(self) -> int:
+        return self.INDEX.unpack_from(self.buf, 0)[0]
+
+    def _tail(self) -> int:
+        return self.INDEX.unpack_from(self.buf, 64)[0]
+
+    def push(self, *values) -> bool:
+        """写入一条记录; 缓冲区满时返回False"""
+        head = self._head()
+        if head - self._tail() >= self.capacity:
+            return False
+        offset = self.HEADER + (head % self.capacity) * self.slot_size
+        self.record.pack_into(self.buf, offset + self.INDEX.size, *values)
+        self.INDEX.pack_into(self.buf, offset, head + 1)
+        self.INDEX.pack_into(self.buf, 0, head + 1)
+        return True
+
+    def pop(self) -> Optional[tuple]:
+        """读取一条记录; 没有数据时返回None"""
+        tail = self._tail()
+        if tail >= self._head():
+            return None
+        offset = self.HEADER + (tail % self.capacity) * self.slot_size
+        if self.INDEX.unpack_from(self.buf, offset)[0] != tail + 1:
+            return None
+        values = self.record.unpack_from(self.buf, offset + self.INDEX.size)
+        self.INDEX.pack_into(self.buf, 64, tail + 1)
+        return values
+
+    def close(self, unlink: bool = False):
+        self.buf = None
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+def _drain(ring: ShmRing, ready) -> List[tuple]:
+    """阻塞到ready被释放, 然后取出环中现有的全部记录 (可能为空)"""
+    ready.acquire()
+    records = []
+    while True:
+        record = ring.pop()
+        if record is None:
+            return records
+        records.append(record)
+
+
+def _motor_process_main(port: str, motor_ids: List[int], command_ring: str, result_ring: str,
+                        scheduler_options: Dict[str, Any], commands_ready, results_ready):
+    """电机进程入口: 独占CAN驱动, 从命令环读取请求交给CanScheduler, 结果写入结果环"""
+    import myactuator_rmd_py as rmd
+    from motor_controller.can_scheduler import CanScheduler
+
+    commands = ShmRing(COMMAND, name=command_ring)
+    results = ShmRing(RESULT, name=result_ring)
+    result_lock = threading.Lock()
+
+    driver = rmd.CanDriver(port)
+    names = [f"motor_{i}" for i in range(len(motor_ids))]
+    actuators = {name: rmd.ActuatorInterface(driver, can_id) for name, can_id in zip(names, motor_ids)}
+    scheduler = CanScheduler(actuators, **scheduler_options)
+    scheduler.start()
+
+    # 初始化完成后冻结现有对象, 减少热路径上的GC扫描
+    gc.collect()
+    gc.freeze()
+    # 请求ID为0的结果表示电机进程已就绪
+    results.push(0, OP_SHUTDOWN, RESULT_OK, 0.0, 0.0, 0.0, 0.0, 0.0)
+    results_ready.release()
+    # 尚未完成的请求, 调用方超时后可按请求ID取消
+    inflight: Dict[int, Future] = {}
+
+    def _on_done(request_id: int, op: int, submitted: float, future: Future):
+        inflight.pop(request_id, None)
+        values = (0.0, 0.0, 0.0, 0.0)
+        ok = RESULT_FAILED
+        if future.cancelled():
+            ok = RESULT_CANCELLED
+        elif future.exception() is None:
+            ok = RESULT_OK
+            if op in STATUS_FIELDS:
+                status = future.result()
+                values = tuple(float(STATUS_TYPES.get(field, float)(getattr(status, field)))
+                               for field in STATUS_FIELDS[op])
+        rtt_ms = (time.perf_counter() - submitted) * 1000
+        with result_lock:
+            while not results.push(request_id, op, ok, rtt_ms, *values):
+                time.sleep(0.0001)
+            results_ready.release()
+
+    running = True
+    while running:
+        for record in _drain(commands, commands_ready):
+            request_id, op, motor_index, arg1, arg2, epoch = record
+            epoch = epoch - 1 if epoch else None
+            if op == OP_SHUTDOWN:
+                running = False
+                break
+            if op == OP_CANCEL:
+                scheduler.latch(epoch or 0)
+                continue
+            if op == OP_ABORT:
+                future = inflight.get(request_id)
+                if future is not None:
+                    future.cancel()
+                continue
+
+            args = (arg1, arg2) if op == OP_SETPOINT else ()
+            submitted = time.perf_counter()
+            future = scheduler.submit(names[motor_index], OP_METHODS[op], *args, epoch=epoch)
+            inflight[request_id] = future
+            future.add_done_callback(
+                lambda f, rid=request_id, o=op, t=submitted: _on_done(rid, o, t, f))
+
+    scheduler.stop()
+    commands.close()
+    results.close()
+
+
+class ShmMotorDriver:
+    """主进程一侧的电机进程句柄, 负责启动进程、发送命令和分发结果"""
+
+    def __init__(self, port: str, motor_ids: Dict[str, int], scheduler_options: Optional[Dict[str, Any]] = None,
+                 capacity: int = 256):
+        self.port = port
+        self.motor_names = list(motor_ids)
+        self.motor_ids = list(motor_ids.values())
+        self.scheduler_options = scheduler_options or {}
+
+        self.commands = ShmRing(COMMAND, capacity)
+        self.results = ShmRing(RESULT, capacity)
+        # spawn避免把主进程的线程和锁状态复制到电机进程; 信号量必须来自同一个上下文
+        self._ctx = multiprocessing.get_context("spawn")
+        self._commands_ready = self._ctx.Semaphore(0)
+        self._results_ready = self._ctx.Semaphore(0)
+        self._command_lock = threading.Lock()
+        self._pending: Dict[int, Future] = {}
+        self._ids = itertools.count(1)
+        self._running = False
+        self._ready = threading.Event()
+        self._reader: Optional[threading.Thread] = None
+        self.process = None
+        self.rtt_ms: List[float] = []
+
+    def start(self, timeout: float = 10.0):
+        """启动电机进程和结果读取线程, 等待电机进程打开CAN驱动"""
+        self.process = self._ctx.Process(
+            target=_motor_process_main,
+            args=(self.port, self.motor_ids, self.commands.name, self.results.name, self.scheduler_options,
+                  self._commands_ready, self._results_ready),
+            name="motor-driver",
+            daemon=True
+        )
+        self.process.start()
+        self._running = True
+        self._reader = threading.Thread(target=self._read_results, name="motor-results", daemon=True)
+        self._reader.start()
+        # 等待就绪期间检查电机进程是否已退出(如驱动导入失败), 不必等满timeout
+        deadline = time.monotonic() + timeout
+        while not self._ready.wait(0.05):
+            if not self.process.is_alive() or time.monotonic() >= deadline:
+                exitcode = self.process.exitcode
+                self.close()
+                raise RuntimeError(f"电机进程启动失败 (exitcode {exitcode})")
+        logger.info(f"电机进程已启动, pid {self.process.pid}")
+
+    def _push(self, request_id: int, op: int, motor_index: int = 0, arg1: float = 0.0, arg2: float = 0.0,
+              epoch: Optional[int] = None):
+        encoded = 0 if epoch is None else epoch + 1
+        # 主进程里可能有多个线程发送命令, 用进程内锁保证命令环只有一个生产者
+        with self._command_lock:
+            while not self.commands.push(request_id, op, motor_index, arg1, arg2, encoded):
+                time.sleep(0.0001)
+        self._commands_ready.release()
+
+    def _submit(self, motor_id: str, op: int, arg1: float, arg2: float, epoch: Optional[int]):
+        future = Future()
+        future.set_running_or_notify_cancel()
+        motor_index = self.motor_names.index(motor_id)
+        # 先登记再发送, 防止结果先于登记到达
+        request_id = next(self._ids)
+        self._pending[request_id] = future
+        self._push(request_id, op, motor_index, arg1, arg2, epoch)
+        return request_id, future
+
+    def submit(self, motor_id: str, op: int, arg1: float = 0.0, arg2: float = 0.0,
+               epoch: Optional[int] = None) -> Future:
+        """发送命令, 返回Future; epoch为发出该命令的急停epoch, 电机进程据此拒绝急停前的设定点"""
+        return self._submit(motor_id, op, arg1, arg2, epoch)[1]
+
+    def call(self, motor_id: str, op: int, arg1: float = 0.0, arg2: float = 0.0,
+             timeout: Optional[float] = 1.0, epoch: Optional[int] = None) -> Any:
+        """发送命令并等待结果; 超时后不再等待结果, 并取消电机进程中仍在排队的该请求"""
+        request_id, future = self._submit(motor_id, op, arg1, arg2, epoch)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            self._pending.pop(request_id, None)
+            self._push(request_id, OP_ABORT)
+            raise
+
+    def cancel(self, epoch: int = 0):
+        """急停闩锁: 电机进程推进到epoch, 取消排队的设定点和遥测, 之后不再执行旧epoch的设定点"""
+        self._push(next(self._ids), OP_CANCEL, epoch=epoch)
+
+    def _read_results(self):
+        while self._running:
+            for record in _drain(self.results, self._results_ready):
+                self._dispatch(record)
+
+    def _dispatch(self, record: tuple):
+        request_id, op, ok, rtt_ms, *values = record
+        if request_id == 0:
+            self._ready.set()
+            return
+        self.rtt_ms.append(rtt_ms)
+        if len(self.rtt_ms) > 1000:
+            del self.rtt_ms[:500]
+        future = self._pending.pop(request_id, None)
+        if future is None:
+            return
+        if ok == RESULT_CANCELLED:
+            # 被急停闩锁或取消请求拒绝, 与进程内调度器一样表现为CancelledError
+            future.set_exception(CancelledError())
+        elif ok != RESULT_OK:
+            future.set_exception(RuntimeError(f"电机进程执行{OP_METHODS.get(op, op)}失败"))
+        elif op in STATUS_FIELDS:
+            future.set_result(SimpleNamespace(**{
+                field: STATUS_TYPES.get(field, float)(value) for field, value in zip(STATUS_FIELDS[op], values)
+            }))
+        else:
+            future.set_result(None)
+
+    def close(self):
+        """关闭电机进程并释放共享内存"""
+        if self.process is not None and self.process.is_alive():
+            self._push(next(self._ids), OP_SHUTDOWN)
+            self.process.join(timeout=2)
+        self._running = False
+        # 唤醒阻塞在信号量上的读取线程
+        self._results_ready.release()
+        if self._reader is not None:
+            self._reader.join(timeout=1)
+        self.commands.close(unlink=True)
+        self.results.close(unlink=True)
+
+
+class ShmActuatorProxy:
+    """电机进程中ActuatorInterface的代理, 方法名与rmd.ActuatorInterface一致"""
+
+    def __init__(self, driver: ShmMotorDriver, motor_id: str, timeout: Optional[float] = 1.0):
+        self.driver = driver
+        self.motor_id = motor_id
+        self.timeout = timeout
+
+    def sendPositionAbsoluteSetpoint(self, angle: float, speed: float, epoch: Optional[int] = None):
+        return self.driver.call(self.motor_id, OP_SETPOINT, angle, speed, timeout=self.timeout, epoch=epoch)
+
+    def stopMotor(self):
+        return self.driver.call(self.motor_id, OP_STOP, timeout=self.timeout)
+
+    def getMotorStatus1(self):
+        return self.driver.call(self.motor_id, OP_STATUS1, timeout=self.timeout)
+
+    def getMotorStatus2(self):
+        return self.driver.call(self.motor_id, OP_STATUS2, timeout=self.timeout)
+
+    def getMotorStatus3(self):
+        return self.driver.call(self.motor_id, OP_STATUS3, timeout=self.timeout)
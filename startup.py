@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启动编排器
+并行初始化CAN总线、Ollama和ASR服务, 并输出各组件的就绪状态和耗时
+"""
+
+import time
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List, Optional
+from loguru import logger
+
+
+class StartupOrchestrator:
+    """并行启动各组件, 记录每个组件的就绪状态和耗时"""
+
+    def __init__(self):
+        self.components: List[Dict[str, Any]] = []
+        self.report: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, name: str, func: Callable[[], Any], required: bool = False):
+        """注册组件; func返回的内容作为详情, 抛出异常或返回False视为失败"""
+        self.components.append({"name": name, "func": func, "required": required})
+
+    def _run_component(self, component: Dict[str, Any], t0: float) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            detail = component["func"]()
+            ready = detail is not False
+            error = None
+        except Exception as e:
+            detail = None
+            ready = False
+            error = str(e)
+        end = time.perf_counter()
+        return {
+            "ready": ready,
+            "required": component["required"],
+            "started_ms": (start - t0) * 1000,
+            "elapsed_ms": (end - start) * 1000,
+            "detail": detail,
+            "error": error
+        }
+
+    def run(self, timeout: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """并行运行所有组件, 返回就绪报告; 超过timeout秒仍未完成的组件记为超时, 不再等待"""
+        t0 = time.perf_counter()
+        deadline = None if timeout is None else t0 + timeout
+        # 每个组件一个守护线程: 卡住的组件既不会让超时失效, 也不会阻止进程退出
+        futures = {}
+        for component in self.components:
+            future = Future()
+            futures[component["name"]] = (component, future)
+            threading.Thread(
+                target=lambda c=component, f=future: f.set_result(self._run_component(c, t0)),
+                name=f"startup-{component['name']}",
+                daemon=True
+            ).start()
+
+        for name, (component, future) in futures.items():
+            remaining = None if deadline is None else max(0.0, deadline - time.perf_counter())
+            try:
+                self.report[name] = future.result(timeout=remaining)
+            except FutureTimeoutError:
+                self.report[name] = {"ready": False, "required": component["required"], "started_ms": 0.0,
+                                     "elapsed_ms": (time.perf_counter() - t0) * 1000,
+                                     "detail": None, "error": f"超时 ({timeout}秒)"}
+        self.total_ms = (time.perf_counter() - t0) * 1000
+        return self.report
+
+    @property
+    def ready(self) -> bool:
+        """所有必需组件是否就绪"""
+        return all(r["ready"] for r in self.report.values() if r["required"])
+
+    def print_report(self):
+        """输出各组件就绪状态和耗时"""
+        logger.info("启动报告:")
+        for name, r in sorted(self.report.items(), key=lambda item: item[1]["elapsed_ms"], reverse=True):
+            mark = "✅" if r["ready"] else ("❌" if r["required"] else "⚠️ ")
+            info = r["error"] if r["error"] else r["detail"]
+            logger.info(f"  {mark} {name:<10} {r['elapsed_ms']:8.1f}ms  {info}")
+        logger.info(f"  总耗时 {self.total_ms:.1f}ms (串行需 {sum(r['elapsed_ms'] for r in self.report.values()):.1f}ms)")
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CAN调度器测试
+优先级顺序、超时取消、急停闩锁, 以及批次执行中被取消时I/O线程不会退出
+"""
+
+import time
+from concurrent.futures import CancelledError, TimeoutError as FutureTimeoutError
+
+import pytest
+
+pytest.importorskip("loguru")
+
+from motor_controller.can_scheduler import CanScheduler, ScheduledActuator
+
+
+class FakeActuator:
+    def __init__(self, name, log, delay=0.0):
+        self.name = name
+        self.log = log
+        self.delay = delay
+
+    def _record(self, method, *args):
+        time.sleep(self.delay)
+        self.log.append((self.name, method) + args)
+
+    def sendPositionAbsoluteSetpoint(self, angle, speed):
+        self._record("setpoint", angle)
+
+    def stopMotor(self):
+        self._record("stop")
+
+    def getMotorStatus1(self):
+        self._record("status")
+        return "status"
+
+
+def make_scheduler(delay=0.0, **options):
+    log = []
+    actuators = {f"motor_{i}": FakeActuator(f"motor_{i}", log, delay) for i in (1, 2)}
+    options.setdefault("report_interval", 0)
+    return CanScheduler(actuators, **options), log
+
+
+def test_requests_run_in_priority_order():
+    scheduler, log = make_scheduler(telemetry_rate=1000)
+    futures = [
+        scheduler.submit("motor_1", "getMotorStatus1"),
+        scheduler.submit("motor_1", "sendPositionAbsoluteSetpoint", 10, 100),
+        scheduler.submit("motor_2", "stopMotor"),
+        scheduler.submit("motor_2", "sendPositionAbsoluteSetpoint", 20, 100)
+    ]
+    scheduler.start()
+    try:
+        for future in futures:
+            future.result(timeout=1)
+    finally:
+        scheduler.stop()
+    assert [entry[1] for entry in log] == ["stop", "setpoint", "setpoint", "status"]
+    # 同一优先级按提交顺序
+    assert [entry[2] for entry in log if entry[1] == "setpoint"] == [10, 20]
+
+
+def test_call_cancels_the_request_on_timeout():
+    scheduler, log = make_scheduler(delay=0.2)
+    scheduler.start()
+    try:
+        busy = scheduler.submit("motor_1", "sendPositionAbsoluteSetpoint", 1, 100)
+        time.sleep(0.05)
+        with pytest.raises(FutureTimeoutError):
+            scheduler.call("motor_2", "sendPositionAbsoluteSetpoint", 2, 100, timeout=0.05)
+        busy.result(timeout=1)
+        time.sleep(0.3)
+    finally:
+        scheduler.stop()
+    assert log == [("motor_1", "setpoint", 1)]
+    assert scheduler.get_stats()["classes"]["setpoint"]["cancelled"] == 1
+
+
+def test_latch_rejects_setpoints_from_an_older_epoch():
+    scheduler, log = make_scheduler()
+    scheduler.start()
+    try:
+        scheduler.latch(1)
+        with pytest.raises(CancelledError):
+            scheduler.call("motor_1", "sendPositionAbsoluteSetpoint", 1, 100, epoch=0)
+        scheduler.call("motor_1", "sendPositionAbsoluteSetpoint", 2, 100, epoch=1)
+        scheduler.call("motor_1", "sendPositionAbsoluteSetpoint", 3, 100)
+    finally:
+        scheduler.stop()
+    assert [entry[2] for entry in log] == [2, 3]
+
+
+class InterruptingActuator(FakeActuator):
+    """第一次下发设定点时模拟另一个线程的急停: 提交stopMotor, 可选地推进闩锁清空队列"""
+
+    def __init__(self, name, log, scheduler_ref, latch):
+        super().__init__(name, log)
+        self.scheduler_ref = scheduler_ref
+        self.latch = latch
+
+    def sendPositionAbsoluteSetpoint(self, angle, speed):
+        super().sendPositionAbsoluteSetpoint(angle, speed)
+        scheduler = self.scheduler_ref[0]
+        if angle == 0:
+            scheduler.submit(self.name, "stopMotor")
+            if self.latch:
+                scheduler.latch(scheduler.epoch + 1)
+
+
+@pytest.mark.parametrize("latch", [False, True], ids=["preempt", "latch"])
+def test_stop_preempts_a_batch_in_flight(latch):
+    log = []
+    ref = []
+    scheduler = CanScheduler({"motor_1": InterruptingActuator("motor_1", log, ref, latch)},
+                             batch_size=8, report_interval=0)
+    ref.append(scheduler)
+    futures = [scheduler.submit("motor_1", "sendPositionAbsoluteSetpoint", i, 100) for i in range(4)]
+    scheduler.start()
+    try:
+        for future in futures:
+            try:
+                future.result(timeout=1)
+            except CancelledError:
+                pass
+        # I/O线程仍然存活, 之后的急停照常执行
+        assert scheduler._thread.is_alive()
+        scheduler.call("motor_1", "stopMotor", timeout=1)
+    finally:
+        scheduler.stop()
+
+    remaining = [] if latch else [("motor_1", "setpoint", i) for i in (1, 2, 3)]
+    assert log == [("motor_1", "setpoint", 0), ("motor_1", "stop")] + remaining + [("motor_1", "stop")]
+
+
+def test_scheduled_actuator_proxies_through_the_scheduler():
+    scheduler, log = make_scheduler()
+    scheduler.start()
+    try:
+        actuator = ScheduledActuator(scheduler, "motor_2")
+        assert actuator.getMotorStatus1() == "status"
+        actuator.sendPositionAbsoluteSetpoint(5, 100, epoch=scheduler.epoch)
+    finally:
+        scheduler.stop()
+    assert log == [("motor_2", "status"), ("motor_2", "setpoint", 5)]
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+转写去重和设定点合并测试
+"""
+
+from concurrent.futures import CancelledError
+
+import pytest
+
+pytest.importorskip("loguru")
+
+from llm.speculative import normalize_transcript
+from motor_controller.coalescer import SetpointCoalescer, TranscriptDeduper
+
+
+@pytest.mark.parametrize("a, b", [
+    ("rotate motor 1 to 90", "rotate motor 1 to -90."),
+    ("rotate motor 1 to 90", "rotate motor 1 to 90.5"),
+    ("turn left by 30", "turn right by 30"),
+    ("rotate clockwise 30 degrees", "rotate counterclockwise 30 degrees"),
+    ("move motor 1 up", "move motor 1 down"),
+    ("move motor one to 30", "move motor two to 30"),
+    ("电机1向左转30度", "电机1向右转30度"),
+    ("1号电机顺时针转30度", "2号电机顺时针转30度")
+])
+def test_different_commands_are_not_similar(a, b):
+    deduper = TranscriptDeduper()
+    assert deduper.similarity(normalize_transcript(a), normalize_transcript(b)) == 0.0
+    assert deduper.accept(a, now=0.0)
+    assert deduper.accept(b, now=1.0)
+
+
+def test_resent_transcript_is_a_duplicate_inside_the_window():
+    deduper = TranscriptDeduper(window=5.0)
+    assert deduper.accept("Rotate motor 1 to 30 degrees.", now=0.0)
+    assert not deduper.accept("rotate motor 1 to 30 degrees", now=1.0)
+    assert not deduper.accept("turn motor 1 to 30 degrees", now=2.0)
+    assert deduper.accept("rotate motor 1 to 30 degrees", now=10.0)
+    assert deduper.stats == {"accepted": 2, "duplicates": 2}
+
+
+class RecordingSend:
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.sent = []
+
+    def __call__(self, motor_id, angle, speed, epoch=None):
+        if motor_id in self.fail:
+            raise RuntimeError("CAN write failed")
+        self.sent.append((motor_id, angle, speed, epoch))
+
+
+def test_latest_setpoint_wins_and_reports_outcome():
+    send = RecordingSend()
+    coalescer = SetpointCoalescer(send, hold=0.05)
+    first = coalescer.submit("motor_1", 10, 100)
+    second = coalescer.submit("motor_1", 20, 100, epoch=3)
+    other = coalescer.submit("motor_2", 5, 100)
+    coalescer.start()
+    try:
+        assert first.result(timeout=1) is False
+        assert second.result(timeout=1) is True
+        assert other.result(timeout=1) is True
+    finally:
+        coalescer.stop()
+    assert sorted(send.sent) == [("motor_1", 20, 100, 3), ("motor_2", 5, 100, None)]
+
+
+def test_send_failure_reaches_the_caller():
+    coalescer = SetpointCoalescer(RecordingSend(fail={"motor_1"}), hold=0)
+    coalescer.start()
+    try:
+        with pytest.raises(RuntimeError):
+            coalescer.submit("motor_1", 10, 100).result(timeout=1)
+    finally:
+        coalescer.stop()
+
+
+def test_clear_cancels_pending_setpoints():
+    send = RecordingSend()
+    coalescer = SetpointCoalescer(send)
+    future = coalescer.submit("motor_1", 10, 100)
+    coalescer.clear()
+    coalescer.start()
+    try:
+        with pytest.raises(CancelledError):
+            future.result(timeout=1)
+    finally:
+        coalescer.stop()
+    assert send.sent == []
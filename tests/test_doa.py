@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DOA反射测试
+标定映射、圆周平均, 以及control_motor向标定的电机(而不是固定的motor_1)下发设定点
+"""
+
+import pytest
+
+pytest.importorskip("loguru")
+
+from audio.doa import DoaReflex, DoaTracker, wrap_angle
+from motor_controller.myactuator_controller_ollama import MyActuatorControllerOllama
+
+
+class FakeActuator:
+    def __init__(self):
+        self.setpoints = []
+
+    def sendPositionAbsoluteSetpoint(self, angle, speed):
+        self.setpoints.append((angle, speed))
+
+    def stopMotor(self):
+        pass
+
+
+@pytest.fixture
+def controller():
+    controller = MyActuatorControllerOllama("test", connect=False)
+    controller.attach({motor_id: FakeActuator() for motor_id in controller.motor_ids})
+    yield controller
+    controller.setpoints.stop()
+    controller.scheduler.stop()
+
+
+def test_wrap_angle():
+    assert wrap_angle(190) == -170
+    assert wrap_angle(-190) == 170
+    assert wrap_angle(180) == -180
+
+
+def test_smoothed_averages_across_zero():
+    tracker = DoaTracker(tuning=None, window=1.0)
+    tracker.add_sample(350, now=0.0)
+    tracker.add_sample(10, now=0.1)
+    assert wrap_angle(tracker.smoothed(now=0.2)) == pytest.approx(0.0, abs=1e-6)
+    assert tracker.smoothed(max_age=1.0, now=5.0) is None
+
+
+def test_calibration_maps_and_clamps():
+    reflex = DoaReflex(None, DoaTracker(tuning=None),
+                       calibration={"offset": 90, "invert": True, "min_angle": -45, "max_angle": 45})
+    assert reflex.doa_to_motor_angle(120) == -30
+    assert reflex.doa_to_motor_angle(0) == 45
+
+
+def test_reflex_moves_the_calibrated_motor(controller):
+    tracker = DoaTracker(tuning=None)
+    tracker.add_sample(30)
+    reflex = DoaReflex(controller, tracker, calibration={"motor_id": "motor_2"})
+
+    result = reflex.try_handle("look at me")
+
+    assert result["success"]
+    motors = controller.scheduler.actuators
+    assert motors["motor_2"].setpoints == [(-30.0, 300.0)]
+    assert motors["motor_1"].setpoints == []
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+急停通道测试
+使用模拟的myactuator_rmd_py, 急停经过真实的MyActuatorControllerOllama、取消闩锁,
+以及CanScheduler(进程内)或共享内存电机进程(out_of_process)两条路径
+"""
+
+import sys
+import time
+import threading
+
+import pytest
+
+pytest.importorskip("loguru")
+
+from motor_controller.emergency_stop import EmergencyStop
+from motor_controller.myactuator_controller_ollama import MyActuatorControllerOllama
+
+
+# 写入临时目录的模拟驱动; 电机进程以spawn启动, 通过继承的sys.path导入它
+FAKE_RMD = '''
+import time
+
+STOP_DELAY = 0.0005
+
+
+class CanDriver:
+    def __init__(self, port):
+        self.port = port
+
+
+class _Status:
+    temperature = 30
+    is_brake_released = True
+    voltage = 24
+    error_code = 0
+    current = 0.1
+    shaft_speed = 0
+    shaft_angle = 0
+    current_phase_a = current_phase_b = current_phase_c = 0.0
+
+
+class ActuatorInterface:
+    def __init__(self, driver, can_id):
+        self.can_id = can_id
+
+    def sendPositionAbsoluteSetpoint(self, angle, speed):
+        time.sleep(STOP_DELAY)
+
+    def stopMotor(self):
+        time.sleep(STOP_DELAY)
+
+    def getMotorStatus1(self):
+        return _Status()
+
+    getMotorStatus2 = getMotorStatus3 = getMotorStatus1
+'''
+
+
+@pytest.fixture(params=[False, True], ids=["in-process", "out-of-process"])
+def controller(request, tmp_path, monkeypatch):
+    (tmp_path / "myactuator_rmd_py.py").write_text(FAKE_RMD)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "myactuator_rmd_py", raising=False)
+
+    controller = MyActuatorControllerOllama("test", out_of_process=request.param)
+    yield controller
+    controller.setpoints.stop()
+    if controller.scheduler is not None:
+        controller.scheduler.stop()
+    else:
+        controller.driver.close()
+
+
+def test_worst_case_latency_under_setpoint_load(controller):
+    estop = EmergencyStop(controller, bound_ms=50.0)
+    estop.start()
+    busy = threading.Event()
+
+    def _setpoints():
+        angle = 0
+        while not busy.is_set():
+            for motor_id in controller.motor_ids:
+                controller.control_motor(motor_id, angle % 90)
+            angle += 1
+            time.sleep(0.001)
+
+    def _load():
+        while not busy.is_set():
+            sum(i * i for i in range(2000))
+
+    threads = [threading.Thread(target=target, daemon=True) for target in (_setpoints, _load)]
+    for thread in threads:
+        thread.start()
+    try:
+        for _ in range(100):
+            estop.trigger("test")
+            assert estop.wait(timeout=1)
+            assert estop.last_event["result"]["success"]
+            time.sleep(0.002)
+    finally:
+        busy.set()
+        estop.stop()
+        for thread in threads:
+            thread.join(timeout=1)
+
+    stats = estop.get_stats()
+    assert stats["count"] == 100
+    assert stats["max_ms"] <= stats["bound_ms"]
+
+
+def test_setpoints_from_before_stop_are_rejected(controller):
+    epoch = controller.current_epoch()
+    controller._send_setpoint("motor_1", 10, 100, epoch=epoch)
+
+    controller.cancel_pending()
+    assert controller.stop_all_motors()["success"]
+
+    # 急停前检查过取消状态的发送方, 在stopMotor之后提交的设定点不会执行
+    with pytest.raises(Exception):
+        controller._send_setpoint("motor_1", 20, 100, epoch=epoch)
+    controller._send_setpoint("motor_1", 30, 100, epoch=controller.current_epoch())
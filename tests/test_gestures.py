@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+手势编译和执行测试
+"""
+
+import json
+import os
+
+import pytest
+
+pytest.importorskip("loguru")
+
+from motor_controller.gestures import GesturePlayer, compile_gestures
+
+
+MOTORS = ["motor_1", "motor_2", "motor_3"]
+CONFIG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config.json")
+
+
+def wave(**spec):
+    return {"wave": {"steps": [{"t": 0.0, "motor_id": "motor_1", "angle": 30},
+                               {"t": 0.4, "motor_id": "motor_1", "angle": -30}], **spec}}
+
+
+def test_repeats_are_spaced_by_period():
+    steps = compile_gestures(wave(repeat=3, period=0.8), MOTORS)["wave"]["steps"]
+    assert [t for t, *_ in steps] == pytest.approx([0.0, 0.4, 0.8, 1.2, 1.6, 2.0])
+    # 相邻两次重复之间没有重叠的步骤
+    assert len({t for t, *_ in steps}) == len(steps)
+
+
+def test_repeat_requires_period():
+    with pytest.raises(ValueError, match="period"):
+        compile_gestures(wave(repeat=2), MOTORS)
+
+
+@pytest.mark.parametrize("period", [0.4, 0.2])
+def test_period_must_exceed_last_step(period):
+    with pytest.raises(ValueError, match="period"):
+        compile_gestures(wave(repeat=2, period=period), MOTORS)
+
+
+def test_single_run_needs_no_period():
+    gesture = compile_gestures(wave(), MOTORS)["wave"]
+    assert gesture["duration"] == pytest.approx(0.4)
+
+
+def test_all_expands_and_invalid_input_is_rejected():
+    steps = compile_gestures({"home": {"steps": [{"t": 0, "motor_id": "all", "angle": 0}]}}, MOTORS)["home"]["steps"]
+    assert sorted(motor for _, motor, _, _ in steps) == MOTORS
+    with pytest.raises(ValueError):
+        compile_gestures({"bad": {"steps": [{"t": 0, "motor_id": "motor_9", "angle": 0}]}}, MOTORS)
+    with pytest.raises(ValueError):
+        compile_gestures({"bad": {"steps": [{"t": 0, "motor_id": "motor_1", "angle": 0, "speed": 900}]}}, MOTORS)
+    with pytest.raises(ValueError):
+        compile_gestures({"bad": {"steps": []}}, MOTORS)
+
+
+def test_shipped_gestures_compile():
+    with open(CONFIG, encoding="utf-8") as f:
+        gestures = json.load(f)["gestures"]
+    assert set(compile_gestures(gestures, MOTORS)) == set(gestures)
+
+
+def test_player_sends_steps_with_the_epoch_at_play_time():
+    sent = []
+    player = GesturePlayer(compile_gestures(wave(repeat=2, period=0.5), MOTORS),
+                           lambda motor_id, angle, speed, epoch=None: sent.append((motor_id, angle, epoch)),
+                           epoch_source=lambda: 7)
+    player.start()
+    try:
+        result = player.play("wave", wait=True)
+    finally:
+        player.stop()
+    assert result["run"]["steps"] == 4 and not result["run"]["cancelled"]
+    assert sent == [("motor_1", 30.0, 7), ("motor_1", -30.0, 7)] * 2
+    assert player.match("please WAVE at me") == "wave"
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模型基准测试的纯逻辑部分: 百分位数、参数比较和模型选择
+"""
+
+import pytest
+
+pytest.importorskip("requests")
+
+from llm.setup_ollama import _arguments_match, _percentile, select_fastest_model
+
+
+def test_percentile_nearest_rank():
+    values = [5, 1, 4, 2, 3]
+    assert _percentile(values, 50) == 3
+    assert _percentile(values, 95) == 5
+    assert _percentile(values, 0) == 1
+    assert _percentile([], 95) == 0.0
+    assert _percentile(list(range(1, 101)), 95) == 95
+
+
+def test_arguments_match_compares_numbers_as_floats():
+    assert _arguments_match({"motor_id": "motor_1", "angle": 90}, {"motor_id": "motor_1", "angle": "90.0"})
+    assert not _arguments_match({"angle": 90}, {"angle": -90})
+    assert not _arguments_match({"angle": 90}, {"angle": "ninety"})
+    assert not _arguments_match({"motor_id": "motor_1"}, {})
+
+
+def _result(model, tool, argument, p95):
+    return {"model": model, "tool_accuracy": tool, "argument_accuracy": argument, "p95_latency_ms": p95}
+
+
+def test_select_fastest_qualified_model():
+    results = [
+        _result("fast-but-wrong", 0.8, 1.0, 100),
+        _result("slow", 1.0, 1.0, 900),
+        _result("fast", 0.95, 0.9, 300),
+        _result("bad-arguments", 1.0, 0.5, 50)
+    ]
+    assert select_fastest_model(results)["model"] == "fast"
+    assert select_fastest_model(results, threshold=0.99)["model"] == "slow"
+    assert select_fastest_model(results, threshold=1.01) is None
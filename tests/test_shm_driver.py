@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共享内存电机驱动测试
+环形缓冲区、状态字段类型还原, 以及调用超时后请求不再下发到电机
+"""
+
+import sys
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+import pytest
+
+pytest.importorskip("loguru")
+
+from motor_controller.shm_driver import (
+    COMMAND, OP_SETPOINT, OP_STATUS1, RESULT_OK,
+    ShmActuatorProxy, ShmMotorDriver, ShmRing
+)
+
+
+def test_ring_is_fifo_and_reports_full():
+    ring = ShmRing(COMMAND, capacity=4)
+    try:
+        for i in range(4):
+            assert ring.push(i, OP_SETPOINT, 0, float(i), 1.0, 0)
+        assert not ring.push(99, OP_SETPOINT, 0, 0.0, 0.0, 0)
+        assert [ring.pop()[0] for _ in range(2)] == [0, 1]
+        # 环绕写入
+        assert ring.push(4, OP_SETPOINT, 0, 4.0, 1.0, 0)
+        assert [ring.pop()[0] for _ in range(3)] == [2, 3, 4]
+        assert ring.pop() is None
+    finally:
+        ring.close(unlink=True)
+
+
+def test_status_fields_keep_their_types():
+    driver = ShmMotorDriver("can0", {"motor_1": 1})
+    try:
+        # 不启动电机进程, 直接登记一个请求并分发结果记录
+        pending = Future()
+        pending.set_running_or_notify_cancel()
+        driver._pending[7] = pending
+        driver._dispatch((7, OP_STATUS1, RESULT_OK, 0.1, 31.0, 1.0, 24.5, 3.0))
+        status = pending.result(timeout=0)
+    finally:
+        driver.commands.close(unlink=True)
+        driver.results.close(unlink=True)
+
+    assert status.temperature == 31 and type(status.temperature) is int
+    assert status.is_brake_released is True
+    assert status.voltage == 24.5
+    assert status.error_code == 3 and type(status.error_code) is int
+
+
+SLOW_RMD = '''
+import time
+
+
+class CanDriver:
+    def __init__(self, port):
+        self.port = port
+
+
+class ActuatorInterface:
+    def __init__(self, driver, can_id):
+        self.can_id = can_id
+
+    def sendPositionAbsoluteSetpoint(self, angle, speed):
+        with open(__file__ + ".log", "a") as f:
+            f.write(f"{angle} ")
+        time.sleep(0.3)
+
+    def stopMotor(self):
+        pass
+'''
+
+
+@pytest.fixture
+def driver(tmp_path, monkeypatch):
+    (tmp_path / "myactuator_rmd_py.py").write_text(SLOW_RMD)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "myactuator_rmd_py", raising=False)
+
+    driver = ShmMotorDriver("can0", {"motor_1": 1})
+    driver.start()
+    driver.log = tmp_path / "myactuator_rmd_py.py.log"
+    yield driver
+    driver.close()
+
+
+def test_timed_out_call_is_aborted(driver):
+    busy = driver.submit("motor_1", OP_SETPOINT, 1.0, 100.0)
+    time.sleep(0.05)
+    with pytest.raises(FutureTimeoutError):
+        ShmActuatorProxy(driver, "motor_1", timeout=0.05).sendPositionAbsoluteSetpoint(2.0, 100.0)
+
+    busy.result(timeout=1)
+    time.sleep(0.4)
+    # 超时的请求不再登记, 也没有在电机进程中下发
+    assert driver._pending == {}
+    assert driver.log.read_text().split() == ["1.0"]
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+推测执行测试
+使用模拟控制器检查假设确认规则(带符号数字必须一致)和commit的等待上限
+"""
+
+import threading
+
+import pytest
+
+pytest.importorskip("loguru")
+
+from llm.speculative import SpeculativeExecutor, normalize_transcript, numeric_tokens
+
+
+TOOL_RESPONSE = {"message": {"tool_calls": [{"function": {"name": "control_motor", "arguments": {}}}]}}
+
+
+class FakeController:
+    def __init__(self, block: bool = False):
+        self.cancel_epoch = 0
+        self.release = threading.Event()
+        self.block = block
+        self.calls = []
+        self.reruns = []
+        self.processed = []
+
+    def call_ollama(self, text):
+        self.calls.append(text)
+        if self.block:
+            self.release.wait(5)
+        return TOOL_RESPONSE
+
+    def execute_natural_language_command(self, command):
+        self.reruns.append(command)
+        return {"success": True, "rerun": True}
+
+    def process_ollama_response(self, response, epoch=None):
+        self.processed.append((response, epoch))
+        return {"success": True}
+
+
+def speculate(executor, text):
+    """让文本稳定到开始推测, 但还没有成为最终结果"""
+    executor.observe(text, now=0.0)
+    executor.observe(text, now=0.6)
+
+
+def test_normalize_keeps_signs_and_decimals():
+    assert normalize_transcript("Rotate motor 1 to -90.5 degrees.") == "rotate motor 1 to -90.5 degrees"
+    assert normalize_transcript("to 90") != normalize_transcript("to -90.")
+    assert numeric_tokens(normalize_transcript("move to -45, then 1.5")) == ["-45", "1.5"]
+
+
+def test_matching_hypothesis_is_committed():
+    controller = FakeController()
+    executor = SpeculativeExecutor(controller)
+    speculate(executor, "Rotate motor 1 to 30 degrees")
+
+    result = executor.commit("rotate motor 1 to 30 degrees.")
+
+    assert result["speculative"] is True
+    assert controller.reruns == []
+    assert controller.processed == [(TOOL_RESPONSE, 0)]
+    assert executor.stats["hits"] == 1
+
+
+@pytest.mark.parametrize("final", ["rotate motor 1 to -30 degrees", "rotate motor 1 to 30.5 degrees"])
+def test_numeric_mismatch_is_a_miss(final):
+    controller = FakeController()
+    executor = SpeculativeExecutor(controller)
+    speculate(executor, "rotate motor 1 to 30 degrees")
+
+    result = executor.commit(final)
+
+    assert result == {"success": True, "rerun": True}
+    assert controller.reruns == [final]
+    assert controller.processed == []
+    assert executor.stats["misses"] == 1
+
+
+def test_hung_speculation_falls_back_after_timeout():
+    controller = FakeController(block=True)
+    executor = SpeculativeExecutor(controller, commit_timeout=0.1)
+    speculate(executor, "rotate motor 1 to 30 degrees")
+    try:
+        result = executor.commit("rotate motor 1 to 30 degrees")
+    finally:
+        controller.release.set()
+
+    assert result == {"success": True, "rerun": True}
+    assert executor.stats["reruns"] == 1
+    assert executor.stats["hits"] == 0
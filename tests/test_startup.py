@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启动编排测试
+超时真正限制启动时间, 以及preload_model对未写tag的模型名的处理
+"""
+
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("loguru")
+
+from startup import StartupOrchestrator
+
+
+def test_components_run_in_parallel():
+    orchestrator = StartupOrchestrator()
+    for name in ("a", "b", "c"):
+        orchestrator.add(name, lambda: time.sleep(0.2) or "ok")
+
+    start = time.perf_counter()
+    report = orchestrator.run(timeout=2.0)
+
+    assert time.perf_counter() - start < 0.5
+    assert all(r["ready"] and r["detail"] == "ok" for r in report.values())
+
+
+def test_timeout_bounds_startup():
+    hang = threading.Event()
+    orchestrator = StartupOrchestrator()
+    orchestrator.add("fast", lambda: True, required=True)
+    orchestrator.add("stuck", lambda: hang.wait(10), required=True)
+
+    start = time.perf_counter()
+    try:
+        report = orchestrator.run(timeout=0.2)
+    finally:
+        hang.set()
+
+    assert time.perf_counter() - start < 1.0
+    assert report["fast"]["ready"]
+    assert not report["stuck"]["ready"]
+    assert "超时" in report["stuck"]["error"]
+    assert not orchestrator.ready
+
+
+def test_failures_are_reported():
+    orchestrator = StartupOrchestrator()
+    orchestrator.add("false", lambda: False)
+    orchestrator.add("raises", lambda: 1 / 0, required=True)
+
+    report = orchestrator.run(timeout=1.0)
+
+    assert not report["false"]["ready"]
+    assert not report["raises"]["ready"] and "division" in report["raises"]["error"]
+    assert not orchestrator.ready
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+@pytest.mark.parametrize("model", ["llama3", "llama3:latest"])
+def test_preload_treats_untagged_name_as_latest(model, monkeypatch):
+    requests = pytest.importorskip("requests")
+    from llm.ollama_motor_controller import OllamaMotorController
+
+    posted = []
+    monkeypatch.setattr(requests, "get", lambda url, timeout: FakeResponse(
+        {"models": [{"name": "llama3:latest", "model": "llama3:latest"}]}))
+    monkeypatch.setattr(requests, "post", lambda url, json, timeout: posted.append(json) or FakeResponse(
+        {"load_duration": 2e6}))
+
+    result = OllamaMotorController(model).preload_model()
+
+    assert result == {"success": True, "load_duration_ms": 2.0}
+    assert posted[0]["model"] == model
+
+
+def test_preload_reports_missing_model(monkeypatch):
+    requests = pytest.importorskip("requests")
+    from llm.ollama_motor_controller import OllamaMotorController
+
+    monkeypatch.setattr(requests, "get", lambda url, timeout: FakeResponse({"models": [{"name": "qwen2.5:7b"}]}))
+
+    result = OllamaMotorController("llama3").preload_model()
+
+    assert not result["success"]
+    assert "llama3" in result["error"]